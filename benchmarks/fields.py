@@ -0,0 +1,62 @@
+import io
+import os
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from parser import ConfParser  # noqa: E402
+
+NUMBER = 100_000
+REPEAT = 5
+
+HOST = """host srv2 {
+    hardware ethernet 00:8C:FA:5B:0C:48;
+    if option arch = 00:07 {
+        filename "srv2/ipxe64.efi";
+    } else {
+        filename "srv2/undionly.kpxe";
+    }
+    fixed-address 38.68.33.3;
+    option option-151 "http://10.32.47.6:1500/dcimini?func=dcimini.osinstall.info&id=zL0vPX8iGvwkfl";
+}
+"""
+
+
+# the single regex scan get_fields used before it read the statement words
+FIELDS_SCAN_RE = re.compile("(?=[hfd])(?:%s)" % "|".join((
+    ConfParser.ETHERNET_PATTERN, ConfParser.FILENAME_PATTERN, ConfParser.FIXED_ADDR_PATTERN,
+    ConfParser.DENY_BOOTING_PATTERN
+)))
+
+
+def measure(name: str, func) -> float:
+    seconds = min(timeit.repeat(func, number=NUMBER, repeat=REPEAT)) / NUMBER
+    print(f"{name:<36}{seconds * 1_000_000:.2f}us")
+    return seconds
+
+
+def search_fields(host_lines: str):
+    return (
+        ConfParser.ETHERNET_RE.search(host_lines),
+        [match.group("filename") for match in ConfParser.FILENAME_RE.finditer(host_lines)],
+        ConfParser.FIXED_ADDR_RE.search(host_lines),
+        ConfParser.DENY_BOOTING_RE.search(host_lines),
+    )
+
+
+if __name__ == "__main__":
+    block, = ConfParser.parse(HOST).hosts()
+    with io.BytesIO(HOST.encode()) as f:
+        scanned_block, = ConfParser.iter_blocks(f)
+    host_lines = HOST[block.open_start:block.end]
+
+    print("Fields of the sample host")
+    measure("search per field", lambda: search_fields(host_lines))
+    scan = measure("single fields scan", lambda: FIELDS_SCAN_RE.findall(host_lines))
+    parsed = measure("get_fields (parse)", lambda: ConfParser.get_fields(host_lines, block.get_statement_words()))
+    scanned = measure("get_fields (iter_blocks)", lambda: ConfParser.get_fields(host_lines, scanned_block.statements))
+    measure("get_fields (string)", lambda: ConfParser.get_fields(host_lines))
+    if max(parsed, scanned) > scan:
+        sys.exit("get_fields from statement words is slower than the fields scan")
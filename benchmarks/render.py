@@ -0,0 +1,58 @@
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from host import Host, Hosts  # noqa: E402
+
+HOSTS_COUNT = 100_000
+
+
+def make_hosts(count: int) -> Hosts:
+    hosts = Hosts()
+    for i in range(count):
+        ethernet = ":".join(f"{(i >> shift) & 0xFF:02X}" for shift in (40, 32, 24, 16, 8, 0))
+        fixed_addr = f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}"
+        if i % 3:
+            hosts.append(Host(f"srv{i}", ethernet, False, f"srv{i}/ipxe64.efi", f"srv{i}/undionly.kpxe", fixed_addr))
+        else:
+            hosts.append(Host(f"srv{i}", ethernet, True))
+    return hosts
+
+
+def measure(name: str, func):
+    start = time.perf_counter()
+    result = func()
+    print(f"{name:<28}{time.perf_counter() - start:.3f}s")
+    return result
+
+
+def render_per_host(hosts: Hosts) -> str:
+    output = io.StringIO()
+    for host in hosts:
+        output.write(host.get_config_string() + "\n")
+    return output.getvalue()
+
+
+def render_bulk(hosts: Hosts) -> str:
+    output = io.StringIO()
+    hosts.render_to(output)
+    return output.getvalue()
+
+
+def render_bulk_to_file(hosts: Hosts):
+    with tempfile.TemporaryFile("w") as f:
+        hosts.render_to(f)
+
+
+if __name__ == "__main__":
+    hosts = make_hosts(HOSTS_COUNT)
+    print(f"Rendering {HOSTS_COUNT} hosts")
+    per_host = measure("get_config_string", lambda: render_per_host(hosts))
+    bulk = measure("Hosts.render_to", lambda: render_bulk(hosts))
+    measure("Hosts.render_to (file)", lambda: render_bulk_to_file(hosts))
+    if per_host != bulk:
+        sys.exit("Bulk output differs from get_config_string")
@@ -0,0 +1,81 @@
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MAIN = os.path.join(ROOT, "main.py")
+RUNS = 5
+# Cumulative `-X importtime` budget of `import main`, every command imports its modules on its own
+IMPORT_BUDGET_US = 30_000
+# Modules a command must not import when it doesn't need them
+HEAVY_MODULES = ("host", "parser", "tools.cli", "tools.batch", "tools.backup", "tools.inventory", "leases",
+                 "concurrent.futures")
+IMPORT_TIME_RE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|( *)(\S+)")
+
+CONFIG = """host srv2 {
+    hardware ethernet 22:22:22:22:22:22;
+    deny booting;
+}
+host srv1 {
+    hardware ethernet 11:11:11:11:11:11;
+    deny booting;
+}
+"""
+
+
+def get_import_times(arguments) -> Tuple[int, Dict[str, int]]:
+    # total microseconds of imports and cumulative microseconds of every imported module
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", *arguments], cwd=ROOT, capture_output=True, text=True
+    )
+    total_time = 0
+    import_times = {}
+    for match in IMPORT_TIME_RE.finditer(result.stderr):
+        import_times[match.group(4)] = int(match.group(2))
+        if len(match.group(3)) == 1:
+            total_time += int(match.group(2))
+    return total_time, import_times
+
+
+def measure(name: str, arguments, heavy_modules=()) -> bool:
+    total_times = []
+    wall_times = []
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        total_time, import_times = get_import_times(arguments)
+        wall_times.append(time.perf_counter() - start)
+        total_times.append(total_time)
+    print(f"{name:<28}imports {min(total_times) / 1000:6.1f}ms    run {min(wall_times) * 1000:6.1f}ms")
+
+    imported = [module for module in heavy_modules if module in import_times]
+    if imported:
+        print(f"  imports {', '.join(imported)}")
+    return not imported
+
+
+if __name__ == "__main__":
+    directory = tempfile.mkdtemp()
+    try:
+        filename = os.path.join(directory, "dhcpd.conf")
+        with open(filename, "w") as f:
+            f.write(CONFIG)
+
+        is_ok = measure("import main", ["-c", "import main"], HEAVY_MODULES)
+        is_ok &= measure("main.py --help", [MAIN, "--help"], HEAVY_MODULES)
+        is_ok &= measure("main.py backups", [MAIN, "backups", "--file", filename], ("host", "tools.cli", "tools.batch"))
+        is_ok &= measure("main.py check", [MAIN, "check", "--file", filename], HEAVY_MODULES[3:])
+        is_ok &= measure("main.py rm", [MAIN, "rm", "srv3", "--file", filename], HEAVY_MODULES[2:])
+
+        import_time = min(get_import_times(["-c", "import main"])[1]["main"] for _ in range(RUNS))
+        if import_time > IMPORT_BUDGET_US:
+            print(f"import main takes {import_time / 1000:.1f}ms, budget is {IMPORT_BUDGET_US / 1000:.1f}ms")
+            is_ok = False
+    finally:
+        shutil.rmtree(directory)
+    if not is_ok:
+        sys.exit("Startup budget exceeded")
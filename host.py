@@ -1,7 +1,11 @@
 from collections import UserList
-from typing import Iterable, List
+from operator import attrgetter
+from typing import Iterable, Iterator, List, TextIO, Tuple
 
-from parser import ConfParser
+from host_types import HOST_TYPES, RAW, DENY_BOOTING, IF_ELSE, get_host_type, detect_host_type
+from lazy_re import LazyPattern
+from parser import ConfParser, Block, ScannedBlock
+from storage import Storage, get_storage
 
 
 class EmptyRawError(Exception):
@@ -9,6 +13,18 @@ class EmptyRawError(Exception):
 
 
 class Host:
+    TRACKED_FIELDS = (
+        "name",
+        "ethernet",
+        "is_deny_booting",
+        "condition_true_filename",
+        "condition_false_filename",
+        "fixed_addr",
+        "filename",
+        "host_type",
+        "_raw",
+    )
+
     def __init__(
             self,
             name: str,
@@ -16,7 +32,9 @@ class Host:
             is_deny_booting: bool = False,
             condition_true_filename: str | None = None,
             condition_false_filename: str | None = None,
-            fixed_addr: str | None = None
+            fixed_addr: str | None = None,
+            filename: str | None = None,
+            host_type: str | None = None
     ):
         self.name = name
         self.is_child = "alt" in self.name
@@ -25,27 +43,43 @@ class Host:
         self.condition_true_filename = condition_true_filename
         self.condition_false_filename = condition_false_filename
         self.fixed_addr = fixed_addr
+        self.filename = filename
+        self.host_type = host_type
         self._raw = ""
         self.child_hosts = []
+        self.span: Tuple[int, int] | None = None
+        self._clean_values: Tuple | None = None
 
-    def get_config_body(self, use_raw: bool = False):
+    def mark_clean(self):
+        self._clean_values = _get_tracked_values(self)
+
+    @property
+    def is_dirty(self) -> bool:
+        # Hosts are dirty from creation until they are marked clean, e.g. right after parsing
+        return self._clean_values is None or self._clean_values != _get_tracked_values(self)
+
+    def get_booting_host_type(self) -> str:
+        # type of the host without deny booting, toggling deny booting keeps it
+        if self.host_type is None or self.host_type == DENY_BOOTING.name:
+            return IF_ELSE.name
+        return self.host_type
+
+    def get_host_type(self) -> str:
+        if self.is_deny_booting:
+            return DENY_BOOTING.name
+        return self.get_booting_host_type()
+
+    def get_template_key(self, use_raw: bool = False) -> str:
         if use_raw:
-            return self._get_raw()
-        options = "\tdeny booting;" if self.is_deny_booting else f"""if option arch = 00:07 {{
-        filename "{self.condition_true_filename}";
-    }} else {{
-        filename "{self.condition_false_filename}";
-    }}
-    fixed-address {self.fixed_addr};
-    """
-
-        return f"""hardware ethernet {self.ethernet};
-    {options}"""
+            self._get_raw()
+            return RAW.name
+        return self.get_host_type()
+
+    def get_config_body(self, use_raw: bool = False):
+        return get_host_type(self.get_template_key(use_raw)).render_body(self.__dict__)
 
     def get_config_string(self, use_raw: bool = False):
-        return f"""host {self.name} {{
-    {self.get_config_body(use_raw)}
-}}"""
+        return get_host_type(self.get_template_key(use_raw)).render(self.__dict__)
 
     def _get_raw(self):
         if not self._raw:
@@ -54,21 +88,52 @@ class Host:
 
     def set_raw_value(self, raw: str):
         self._raw = raw
-        self.is_deny_booting = ConfParser.is_deny_booting(raw)
-        if not self.is_deny_booting:
-            self.ethernet = ConfParser.get_ethernet(raw)
-            self.condition_true_filename, self.condition_false_filename = ConfParser.get_filenames(raw)
-            self.fixed_addr = ConfParser.get_fixed_addr(raw)
-        else:
-            self.ethernet = None
-            self.condition_true_filename, self.condition_false_filename = None, None
-            self.fixed_addr = None
+        fields = ConfParser.get_fields(raw)
+        values = (detect_host_type(fields) or RAW).get_values(fields)
+        self.is_deny_booting = values.pop("is_deny_booting", False)
+        for key, value in values.items():
+            setattr(self, key, value)
 
     def __repr__(self):
         params = ", ".join([f"{key}: {getattr(self, key)}" for key in self.__dict__.keys() if not key.startswith("__")])
         return f"<{params}>"
 
 
+_get_tracked_values = attrgetter(*Host.TRACKED_FIELDS)
+
+NATURAL_KEY_RE = LazyPattern(r"(\d+)")
+
+
+def get_natural_sort_key(host: Host) -> Tuple:
+    # "srv2" < "srv10", digits are always on odd positions so int and str are never compared
+    return tuple(int(part) if i % 2 else part for i, part in enumerate(NATURAL_KEY_RE.split(host.name)))
+
+
+def get_ip_sort_key(host: Host) -> Tuple[int, int, str]:
+    try:
+        octets = [int(octet) for octet in host.fixed_addr.split(".")]
+    except (AttributeError, ValueError):
+        octets = []
+    if len(octets) != 4:
+        return 1, 0, host.name
+    return 0, (octets[0] << 24) | (octets[1] << 16) | (octets[2] << 8) | octets[3], host.name
+
+
+def get_mac_sort_key(host: Host) -> Tuple[int, int, str]:
+    try:
+        return 0, int(host.ethernet.replace(":", "").replace("-", ""), 16), host.name
+    except (AttributeError, ValueError):
+        return 1, 0, host.name
+
+
+SORT_KEYS = {
+    "name": lambda host: host.name,
+    "natural": get_natural_sort_key,
+    "ip": get_ip_sort_key,
+    "mac": get_mac_sort_key,
+}
+
+
 class HostWithoutMother(Exception):
     ...
 
@@ -103,11 +168,34 @@ class Hosts(UserList):
         self.data = hosts
         self.is_nested = True
 
-    def sort_hosts_by_name(self, sort_child=False):
-        self.sort(key=lambda x: x.name)
+    def sort_hosts(self, sort_by: str = "name", sort_child=False):
+        # list.sort computes the key once per host, keys are plain tuples compared in C
+        try:
+            key = SORT_KEYS[sort_by]
+        except KeyError:
+            raise ValueError(f"Not supported sort key: {sort_by}") from None
+        self.sort(key=key)
         if sort_child:
             for host in self.data:
-                host.child_hosts.sort(key=lambda x: x.name)
+                host.child_hosts.sort(key=key)
+
+    def sort_hosts_by_name(self, sort_child=False):
+        self.sort_hosts("name", sort_child)
+
+    def iter_all_hosts(self) -> Iterator[Host]:
+        for host in self.data:
+            yield host
+            if self.is_nested:
+                yield from host.child_hosts
+
+    def render_to(self, fileobj: TextIO, use_raw: bool = False, separator: str = "\n"):
+        renderers = {name: (host_type.config_template + separator).format_map for name, host_type in HOST_TYPES.items()}
+        fileobj.writelines(
+            renderers[host.get_template_key(use_raw)](host.__dict__) for host in self.iter_all_hosts()
+        )
+
+    def get_dirty_hosts(self) -> "Hosts":
+        return Hosts(host for host in self.iter_all_hosts() if host.is_dirty)
 
     def find_by_name(self, name: str) -> Host | None:
         for host in self.data:
@@ -121,75 +209,100 @@ class Hosts(UserList):
         return None
 
 
+def _create_host(name: str, host_lines: str, statements: List[List[str]] | None = None) -> Host:
+    # host_lines starts with "{" and ends with "}"
+    fields = ConfParser.get_fields(host_lines, statements)
+    host_type = detect_host_type(fields)
+    if host_type is None:
+        host = Host(name=name, **RAW.get_values(fields))
+        host._raw = host_lines[1:-1].strip()
+        return host
+    return Host(name=name, **host_type.get_values(fields))
+
+
+def get_host_from_block(block: Block, lines: str) -> Host:
+    host = _create_host(block.name, lines[block.open_start:block.end], block.get_statement_words())
+    host.span = (block.start, block.end)
+    host.mark_clean()
+    return host
+
+
+def get_host_from_scanned_block(block: ScannedBlock, offset: int = 0) -> Host:
+    # span is in bytes, `offset` is where the scanned data starts in the file
+    host = _create_host(block.name, block.source[block.open_start - block.start:].decode(), block.statements)
+    host.span = (offset + block.start, offset + block.end)
+    host.mark_clean()
+    return host
+
+
+def iter_hosts(filename: str | Storage, chunk_size: int = ConfParser.CHUNK_SIZE) -> Iterator[Host]:
+    # Reads the file chunk by chunk, host spans are byte offsets
+    with get_storage(filename).open_binary() as f:
+        for block in ConfParser.iter_blocks(f, ("host",), chunk_size):
+            yield get_host_from_scanned_block(block)
+
+
 def get_all_hosts_from_config_lines(lines: str) -> Hosts:
-    all_hosts = Hosts()
-    for re_host in ConfParser.get_host_matches(lines):
-        start_brackets_pointer, end_brackets_pointer = ConfParser.get_host_boundaries(re_host, lines)
-        host_lines = lines[start_brackets_pointer:end_brackets_pointer]
-        ethernet = ConfParser.get_ethernet(host_lines)
-        name = ConfParser.get_name(re_host)
-
-        if ConfParser.is_deny_booting(host_lines):
-            all_hosts.append(Host(name=name, ethernet=ethernet, is_deny_booting=True))
-        else:
-            condition_true_filename, condition_false_filename = ConfParser.get_filenames(host_lines)
-            fixed_addr = ConfParser.get_fixed_addr(host_lines)
-            all_hosts.append(
-                Host(
-                    name=name,
-                    ethernet=ethernet,
-                    condition_true_filename=condition_true_filename,
-                    condition_false_filename=condition_false_filename,
-                    fixed_addr=fixed_addr
-                )
-            )
-    return all_hosts
-
-
-def save_host_changes(filename: str, host: Host, use_raw: bool = False):
-    with open(filename, "r") as f:
-        lines = f.read()
-
-    re_host = ConfParser.get_host_match(host.name, lines)
-    start_brackets_pointer, end_brackets_pointer = ConfParser.get_host_boundaries(re_host, lines)
-    new_lines = lines[:re_host.start()] + host.get_config_string(use_raw) + lines[end_brackets_pointer:]
-
-    with open(filename, "w") as f:
-        f.write(new_lines)
-
-
-def add_host(filename: str, host: Host, use_raw: bool = False):
-    with open(filename, "a+") as f:
-        try:
-            f.seek(0, 2)
-            f.seek(f.tell() - 1)
-            start_symbol = "\n" if f.read(1) == "\n" else ""
-        except ValueError:
-            start_symbol = ""
-        f.write(f"{start_symbol}{host.get_config_string(use_raw)}\n")
-
-
-def delete_host(filename: str, host: Host):
-    with open(filename, "r") as f:
-        lines = f.read()
-
-    re_host = ConfParser.get_host_match(host.name, lines)
-    start_host_pointer = re_host.start()
-    start_brackets_pointer, end_brackets_pointer = ConfParser.get_host_boundaries(re_host, lines)
-    new_lines = lines[:start_host_pointer] + lines[end_brackets_pointer:]
-
-    with open(filename, "w") as f:
-        f.write(new_lines)
-
-
-def delete_host_names(filename: str, host_names: List[str]):
-    with open(filename, "r") as f:
-        lines = f.read()
-    for host_name in host_names:
-        re_host = ConfParser.get_host_match(host_name, lines)
-        start_host_pointer = re_host.start()
-        start_brackets_pointer, end_brackets_pointer = ConfParser.get_host_boundaries(re_host, lines)
-        lines = lines[:start_host_pointer] + lines[end_brackets_pointer:]
-
-    with open(filename, "w") as f:
-        f.write(lines)
+    return Hosts(get_host_from_block(block, lines) for block in ConfParser.parse(lines).hosts())
+
+
+def _find_host_block(host_name: str, lines: str) -> Block:
+    block = ConfParser.parse(lines).find_host(host_name)
+    if block is None:
+        raise ValueError(f"Host {host_name} do not exist!")
+    return block
+
+
+def save_host_changes(filename: str | Storage, host: Host, use_raw: bool = False, atomic: bool = False):
+    storage = get_storage(filename)
+    lines = storage.read()
+
+    block = _find_host_block(host.name, lines)
+    storage.write_from(lines, block.start, block.get_source(lines), host.get_config_string(use_raw), atomic)
+
+
+def add_host(filename: str | Storage, host: Host, use_raw: bool = False):
+    # a single host is rendered before the first write, so the file needs no copy
+    add_hosts(filename, [host], use_raw, atomic=False)
+
+
+def add_hosts(filename: str | Storage, hosts: Iterable[Host], use_raw: bool = False, atomic: bool = True) -> List[str]:
+    # hosts are rendered while they are written, `atomic` keeps the file as it was when one of them fails
+    storage = get_storage(filename)
+    start_symbol = "\n" if storage.get_last_char() == "\n" else ""
+    added_names = []
+
+    def iter_parts() -> Iterator[str]:
+        nonlocal start_symbol
+        for host in hosts:
+            yield f"{start_symbol}{host.get_config_string(use_raw)}\n"
+            start_symbol = "\n"
+            added_names.append(host.name)
+
+    storage.append(iter_parts(), atomic)
+    return added_names
+
+
+def delete_host(filename: str | Storage, host: Host):
+    delete_host_names(filename, [host.name])
+
+
+def delete_host_names(filename: str | Storage, host_names: List[str], atomic: bool = False):
+    storage = get_storage(filename)
+    lines = storage.read()
+
+    names = set(host_names)
+    blocks = [block for block in ConfParser.parse(lines).hosts() if block.name in names]
+    missing = names.difference(block.name for block in blocks)
+    if missing:
+        raise ValueError(f"Host {sorted(missing)[0]} do not exist!")
+    if not blocks:
+        return
+
+    offset = blocks[0].start
+    kept_lines = []
+    pointer = offset
+    for block in blocks:
+        kept_lines.append(lines[pointer:block.start])
+        pointer = block.end
+    storage.write_from(lines, offset, lines[offset:pointer], "".join(kept_lines), atomic)
@@ -0,0 +1,166 @@
+from typing import Callable, Dict, Iterable, NamedTuple, Tuple
+
+from parser import ConfParser, HostFields
+
+
+class HostField(NamedTuple):
+    attribute: str
+    label: str
+    # "ethernet", "filename" or "ipv4", tells which validator checks the value
+    kind: str
+
+
+ETHERNET_FIELD = HostField("ethernet", "Ethernet", "ethernet")
+CONDITION_TRUE_FILENAME_FIELD = HostField("condition_true_filename", "if option arch = 00:07 filename", "filename")
+CONDITION_FALSE_FILENAME_FIELD = HostField("condition_false_filename", "else filename", "filename")
+FILENAME_FIELD = HostField("filename", "filename", "filename")
+FIXED_ADDR_FIELD = HostField("fixed_addr", "fixed-address", "ipv4")
+
+VALUE_ATTRIBUTES = ("ethernet", "condition_true_filename", "condition_false_filename", "filename", "fixed_addr")
+
+
+class HostTypeKey(NamedTuple):
+    is_deny_booting: bool
+    has_arch_condition: bool
+    filenames_count: int
+    other_statements: Tuple[str, ...]
+
+
+def get_host_type_key(fields: HostFields) -> HostTypeKey:
+    # deny booting and the arch condition decide the type alone, whatever else the host has,
+    # any other host needs exactly the statements of the type's template
+    if fields.is_deny_booting:
+        return HostTypeKey(True, False, 0, ())
+    if fields.has_arch_condition:
+        return HostTypeKey(False, True, 0, ())
+    return HostTypeKey(False, False, len(fields.filenames), tuple(sorted(fields.other_statements)))
+
+
+def get_field_values(fields: HostFields) -> Dict[str, str | None]:
+    condition_true_filename, condition_false_filename = fields.get_condition_filenames()
+    return {
+        "ethernet": fields.ethernet,
+        "condition_true_filename": condition_true_filename,
+        "condition_false_filename": condition_false_filename,
+        "filename": fields.filenames[0] if fields.filenames else None,
+        "fixed_addr": fields.fixed_addr,
+    }
+
+
+class HostType:
+    def __init__(
+            self,
+            name: str,
+            title: str,
+            option: str,
+            fields: Iterable[HostField],
+            body_template: str,
+            defaults: Dict | None = None,
+            get_values: Callable[[HostFields], Dict] = get_field_values
+    ):
+        self.name = name
+        self.title = title
+        self.option = option.lower()
+        self.fields = tuple(fields)
+        self.body_template = body_template
+        self.config_template = f"host {{name}} {{{{\n    {body_template}\n}}}}"
+        self.render_body = body_template.format_map
+        self.render = self.config_template.format_map
+        self.defaults = defaults or {}
+        self._get_values = get_values
+        # raw hosts declare no fields and keep everything that was found
+        self._attributes = tuple(field.attribute for field in self.fields) or VALUE_ATTRIBUTES
+        self._empty_values = {**self.defaults, **dict.fromkeys(VALUE_ATTRIBUTES), "host_type": self.name}
+        # a host has this type when it has the same statements as the template, raw hosts have no key
+        self.key = None
+        if self.fields:
+            placeholders = {field.attribute: "0" for field in self.fields}
+            self.key = get_host_type_key(ConfParser.get_fields(f"{{{self.render_body(placeholders)}}}"))
+
+    def get_values(self, fields: HostFields) -> Dict:
+        values = self._get_values(fields)
+        result = self._empty_values.copy()
+        for attribute in self._attributes:
+            result[attribute] = values.get(attribute)
+        return result
+
+    def __repr__(self):
+        return f"<HostType {self.name}>"
+
+
+HOST_TYPES: Dict[str, HostType] = {}
+HOST_TYPES_BY_KEY: Dict[HostTypeKey, HostType] = {}
+
+
+def register_host_type(host_type: HostType, before: str | None = None) -> HostType:
+    # `before` only sets where the type is offered in the CLI menu
+    if host_type.name in HOST_TYPES:
+        raise ValueError(f"Host type {host_type.name} already registered")
+    if any(registered.option == host_type.option for registered in HOST_TYPES.values()):
+        raise ValueError(f"Host type option {host_type.option} already used")
+    if host_type.key is not None and host_type.key in HOST_TYPES_BY_KEY:
+        raise ValueError(f"Host type {HOST_TYPES_BY_KEY[host_type.key].name} has the same statements")
+    if host_type.key is not None:
+        HOST_TYPES_BY_KEY[host_type.key] = host_type
+    if before is None:
+        HOST_TYPES[host_type.name] = host_type
+        return host_type
+
+    host_types = list(HOST_TYPES.items())
+    index = [name for name, _ in host_types].index(get_host_type(before).name)
+    host_types.insert(index, (host_type.name, host_type))
+    HOST_TYPES.clear()
+    HOST_TYPES.update(host_types)
+    return host_type
+
+
+def get_host_type(name: str) -> HostType:
+    try:
+        return HOST_TYPES[name]
+    except KeyError:
+        raise ValueError(f"Not supported host type: {name}") from None
+
+
+def get_host_type_by_option(option: str) -> HostType:
+    for host_type in HOST_TYPES.values():
+        if host_type.option == option.lower():
+            return host_type
+    raise ValueError("Not supported pattern option!")
+
+
+def detect_host_type(fields: HostFields) -> HostType | None:
+    return HOST_TYPES_BY_KEY.get(get_host_type_key(fields))
+
+
+RAW = register_host_type(HostType("raw", "Raw", "r", (), "{_raw}"))
+DENY_BOOTING = register_host_type(HostType(
+    "deny_booting",
+    "Deny booting",
+    "d",
+    (ETHERNET_FIELD,),
+    "hardware ethernet {ethernet};\n    \tdeny booting;",
+    defaults={"is_deny_booting": True}
+))
+IF_ELSE = register_host_type(HostType(
+    "if_else",
+    "If-else filenames",
+    "ie",
+    (ETHERNET_FIELD, CONDITION_TRUE_FILENAME_FIELD, CONDITION_FALSE_FILENAME_FIELD, FIXED_ADDR_FIELD),
+    """hardware ethernet {ethernet};
+    if option arch = 00:07 {{
+        filename "{condition_true_filename}";
+    }} else {{
+        filename "{condition_false_filename}";
+    }}
+    fixed-address {fixed_addr};
+    """
+))
+UEFI = register_host_type(HostType(
+    "uefi",
+    "UEFI only filename",
+    "u",
+    (ETHERNET_FIELD, FILENAME_FIELD, FIXED_ADDR_FIELD),
+    """hardware ethernet {ethernet};
+    filename "{filename}";
+    fixed-address {fixed_addr};"""
+))
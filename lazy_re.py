@@ -0,0 +1,20 @@
+import re
+
+
+class LazyPattern:
+    """re.Pattern stand-in that compiles on first use, so importing a module doesn't compile all its regexes."""
+
+    def __init__(self, pattern: str | bytes, flags: int = 0):
+        self._pattern = pattern
+        self._flags = flags
+
+    def __getattr__(self, name: str):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        # compiled attributes (finditer, search, ...) are kept on the instance, next lookups don't get here
+        value = getattr(re.compile(self._pattern, self._flags), name)
+        setattr(self, name, value)
+        return value
+
+    def __repr__(self):
+        return f"LazyPattern({self._pattern!r})"
@@ -0,0 +1,119 @@
+from typing import Dict, Iterator, NamedTuple
+
+from host import iter_hosts
+from parser import ConfParser
+
+
+class Lease:
+    __slots__ = ("ip", "ethernet", "starts", "ends", "binding_state", "client_hostname", "is_latest_for_ip")
+
+    def __init__(
+            self,
+            ip: str,
+            ethernet: str | None = None,
+            starts: str | None = None,
+            ends: str | None = None,
+            binding_state: str | None = None,
+            client_hostname: str | None = None
+    ):
+        self.ip = ip
+        self.ethernet = ethernet
+        self.starts = starts
+        self.ends = ends
+        self.binding_state = binding_state
+        self.client_hostname = client_hostname
+        # False when a later record gave the address to another MAC
+        self.is_latest_for_ip = True
+
+    @property
+    def is_active(self) -> bool:
+        # old leases files have no binding state at all
+        return self.is_latest_for_ip and self.binding_state in (None, "active")
+
+    def __repr__(self):
+        params = ", ".join(f"{key}: {getattr(self, key)}" for key in self.__slots__)
+        return f"<{params}>"
+
+
+class LeaseReport(NamedTuple):
+    kind: str
+    host_name: str
+    ethernet: str | None
+    fixed_addr: str | None
+    lease_ip: str | None
+    # MAC of the lease, for address_taken the MAC that took the fixed-address
+    lease_ethernet: str | None = None
+
+
+CONFLICTING_LEASE = "conflicting_lease"
+DENIED_HOST_LEASE = "denied_host_lease"
+ADDRESS_TAKEN = "address_taken"
+UNUSED_RESERVATION = "unused_reservation"
+
+
+def normalize_ethernet(ethernet: str) -> str:
+    return ethernet.lower().replace("-", ":")
+
+
+def parse_lease(ip: str, lease_lines: str) -> Lease:
+    lease = Lease(ip)
+    for statement in lease_lines.split(";"):
+        words = statement.split()
+        if len(words) < 2:
+            continue
+        if words[0] == "hardware" and words[1] == "ethernet" and len(words) > 2:
+            lease.ethernet = normalize_ethernet(words[2])
+        elif words[0] in ("starts", "ends"):
+            setattr(lease, words[0], " ".join(words[1:]))
+        elif words[0] == "binding" and words[1] == "state" and len(words) > 2:
+            lease.binding_state = words[2]
+        elif words[0] == "client-hostname":
+            lease.client_hostname = words[1].strip("\"")
+    return lease
+
+
+def iter_leases(filename: str, chunk_size: int = ConfParser.CHUNK_SIZE) -> Iterator[Lease]:
+    with open(filename, "rb") as f:
+        for block in ConfParser.iter_blocks(f, ("lease",), chunk_size):
+            body = block.source[block.open_start - block.start + 1:-1].decode()
+            yield parse_lease(block.name, body)
+
+
+def get_latest_leases(filename: str) -> Dict[str, Lease]:
+    # dhcpd appends leases, so the last record is the latest for a MAC and for an address
+    leases = {}
+    ip_ethernets = {}
+    for lease in iter_leases(filename):
+        ip_ethernets[lease.ip] = lease.ethernet
+        if lease.ethernet is not None:
+            leases[lease.ethernet] = lease
+    for lease in leases.values():
+        lease.is_latest_for_ip = ip_ethernets[lease.ip] == lease.ethernet
+    return leases
+
+
+def get_lease_reports(conf_filename: str, leases_filename: str) -> Iterator[LeaseReport]:
+    leases = get_latest_leases(leases_filename)
+    active_leases_by_ip = {lease.ip: lease for lease in leases.values() if lease.is_active}
+
+    for host in iter_hosts(conf_filename):
+        ethernet = normalize_ethernet(host.ethernet) if host.ethernet else None
+        lease = leases.get(ethernet) if ethernet else None
+
+        if host.is_deny_booting:
+            if lease is not None and lease.is_active:
+                yield LeaseReport(DENIED_HOST_LEASE, host.name, host.ethernet, None, lease.ip, lease.ethernet)
+            continue
+
+        if host.fixed_addr is None:
+            continue
+        if lease is None:
+            yield LeaseReport(UNUSED_RESERVATION, host.name, host.ethernet, host.fixed_addr, None)
+        elif lease.is_active and lease.ip != host.fixed_addr:
+            yield LeaseReport(CONFLICTING_LEASE, host.name, host.ethernet, host.fixed_addr, lease.ip, lease.ethernet)
+
+        address_lease = active_leases_by_ip.get(host.fixed_addr)
+        if address_lease is not None and address_lease.ethernet != ethernet:
+            yield LeaseReport(
+                ADDRESS_TAKEN, host.name, host.ethernet, host.fixed_addr, address_lease.ip, address_lease.ethernet
+            )
@@ -0,0 +1,24 @@
+import re
+
+from lazy_re import LazyPattern
+
+# No two alternatives start with the same character, they are ordered by how often they occur
+TOKEN_ALTERNATIVES = r"""
+    (?P<word>[^\s{};#"]+)
+    |(?P<semicolon>;)
+    |(?P<open>\{)
+    |(?P<close>\})
+    |(?P<string>"(?:[^"\\]|\\.)*"?)
+    |(?P<comment>\#[^\n]*)
+"""
+# Every character belongs to exactly one token, so the tokens cover the whole source
+TOKEN_PATTERN = r"(?P<whitespace>\s+)|" + TOKEN_ALTERNATIVES
+# The whitespace before a token is matched with it, the token itself starts at match.start(match.lastgroup).
+# Only the whitespace at the end of the source is matched alone.
+SPACED_TOKEN_PATTERN = r"\s*(?:%s)|(?P<whitespace>\s+)" % TOKEN_ALTERNATIVES
+
+BYTES_TOKEN_RE = LazyPattern(TOKEN_PATTERN.encode(), re.VERBOSE)
+SPACED_TOKEN_RE = LazyPattern(SPACED_TOKEN_PATTERN, re.VERBOSE)
+
+TRIVIA_KINDS = ("whitespace", "comment")
+WORD_KINDS = ("word", "string")
@@ -1,41 +1,145 @@
-import os
 import argparse
+import shlex
+import sys
 
-from tools.cli import add_new_host_with_cli, remove_hosts_from_file, update_host_with_cli, refactor_config_file, \
-    sort_hosts_in_file
+# Keep this module light: handlers and their modules are imported only for the command that runs
 
 
-if __name__ == "__main__":
+def _add_file_argument(parser: argparse.ArgumentParser, multiple: bool = False, piped: bool = False):
+    help_text = 'Path to DHCPD config file'
+    if piped:
+        help_text += ' ("-" to read it from stdin and print result to stdout)'
+    if multiple:
+        help_text += ', several paths or glob patterns change every file'
+    parser.add_argument('--file', nargs='+' if multiple else 1, type=str, required=True, help=help_text)
+
+
+def _add_change_arguments(parser: argparse.ArgumentParser, multiple: bool = False):
+    parser.add_argument('--backup', action='store_true', help='Create backup before changes')
+    parser.add_argument('--sort', action='store_true', help='Sort hosts after changes')
+    parser.add_argument(
+        '--sort-by', choices=('name', 'natural', 'ip', 'mac'), help='Sort hosts by this key (implies --sort)'
+    )
+    parser.add_argument('--refactor', action='store_true', help='Refactor file after changes')
+    parser.add_argument(
+        '--incremental', action='store_true', help='Refactor only hosts added or updated by this run'
+    )
+    if multiple:
+        parser.add_argument('--workers', type=int, help='Number of files processed at once')
+        parser.add_argument(
+            '--threads', action='store_true', help='Process files in threads instead of processes, e.g. for small files'
+        )
+
+
+def _add_backup_depth_argument(parser: argparse.ArgumentParser):
+    parser.add_argument('--backup-depth', type=int, help='Number of backups to keep (10 by default)')
+
+
+def get_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(description='DHCPD Internal CLI tool')
-    parser.add_argument('--file', type=str, help='Path to DHCPD config file', required=True)
+    subparsers = parser.add_subparsers(dest='command', required=True, metavar='COMMAND')
+
+    def add_command(name: str, help_text: str, multiple: bool = False, piped: bool = False, changes: bool = False):
+        command_parser = subparsers.add_parser(name, help=help_text, description=help_text)
+        _add_file_argument(command_parser, multiple, piped)
+        _add_backup_depth_argument(command_parser)
+        if changes:
+            _add_change_arguments(command_parser, multiple)
+        command_parser.set_defaults(handler=f"run_{name.replace('-', '_')}")
+        return command_parser
+
+    add_command('add', 'Add new host', changes=True)
+    add_command('update', 'Update host', changes=True).add_argument('host', help='Hostname')
+    add_command('rm', 'Remove hosts', multiple=True, piped=True, changes=True).add_argument(
+        'hosts', nargs='+', help='Host names to be removed'
+    )
+    add_command('sort', 'Sort hosts', multiple=True, piped=True, changes=True)
+    add_command('refactor', 'Refactor file', multiple=True, piped=True, changes=True)
+    add_command('check', 'Report unformatted hosts without rewriting file', piped=True)
+    add_command('backup', 'Create backup', multiple=True, changes=True)
+    add_command('backups', 'List backups')
+    add_command('backup-diff', 'Show diff between backup and file').add_argument('version', type=int)
+    add_command('restore', 'Restore file from backup').add_argument('version', type=int)
 
+    for name, help_text, path_help in (
+            ('import', 'Add hosts from JSON Lines/CSV file', 'JSON Lines/CSV file ("-" for stdin)'),
+            ('export', 'Export hosts to JSON Lines/CSV file', 'JSON Lines/CSV file ("-" for stdout)'),
+    ):
+        command_parser = add_command(name, help_text, piped=True, changes=name == 'import')
+        command_parser.add_argument('path', help=path_help)
+        command_parser.add_argument(
+            '--format', choices=('jsonl', 'csv'), help='File format, by default guessed from file extension'
+        )
+    add_command('leases', 'Check hosts against dhcpd.leases file').add_argument(
+        'path', help='Path to dhcpd.leases file'
+    )
+    add_command('watch', 'Print hosts added, removed or changed in the file by other programs').add_argument(
+        '--interval', type=float, help='Seconds between checks of the file (1 by default)'
+    )
+    return parser
+
+
+def get_legacy_parser() -> argparse.ArgumentParser:
+    # flags of the tool before the subcommands, kept so the old scripts still work
+    parser = argparse.ArgumentParser(description='DHCPD Internal CLI tool (deprecated flags)')
+    parser.add_argument('--file', type=str, required=True, help='Path to DHCPD config file')
     parser.add_argument('--refactor', action='store_true', help='Refactor file')
     parser.add_argument('--sort', action='store_true', help='Sort hosts')
-    parser.add_argument('--backup', action='store_true', help='Create backup file')
+    parser.add_argument('--backup', action='store_true', help='Create backup')
 
     add_upd_rm_group = parser.add_mutually_exclusive_group()
     add_upd_rm_group.add_argument('--add', action='store_true', help='Add new host')
     add_upd_rm_group.add_argument('--update', type=str, help='Update hostname')
     add_upd_rm_group.add_argument('--rm', nargs='+', type=str, help='Host names to be removed')
-    args = parser.parse_args()
+    return parser
 
-    if not os.path.exists(args.file):
-        parser.error(f'{args.file} not exist. Please check for typo!!')
 
-    if args.backup:
-        with open(args.file, "r") as f:
-            with open(f"{args.file}.backup", "w") as backup_file:
-                backup_file.write(f.read())
+def get_legacy_argv(argv: list[str]) -> list[str] | None:
+    # "--file X --rm srv1 --sort" becomes "rm srv1 --file X --sort", None when argv starts with a command
+    if not argv or not argv[0].startswith('-') or argv[0] in ('-h', '--help'):
+        return None
 
+    parser = get_legacy_parser()
+    args = parser.parse_args(argv)
+    flags = [flag for flag in ('--sort', '--refactor', '--backup') if getattr(args, flag[2:])]
     if args.add:
-        add_new_host_with_cli(args.file)
-    elif args.rm:
-        remove_hosts_from_file(args.file, args.rm)
+        command = ['add']
     elif args.update:
-        update_host_with_cli(args.file, args.update)
+        command = ['update', args.update]
+    elif args.rm:
+        command = ['rm', *args.rm]
+    elif flags:
+        # the first of --sort, --refactor and --backup becomes the command, the rest stay flags
+        command = [flags.pop(0)[2:]]
+    else:
+        parser.error('one of the arguments --add --update --rm --sort --refactor --backup is required')
+    return [*command, '--file', args.file, *flags]
+
 
-    if args.sort:
-        sort_hosts_in_file(args.file)
+def main(argv: list[str] | None = None) -> int:
+    parser = get_parser()
+    argv = sys.argv[1:] if argv is None else argv
+    legacy_argv = get_legacy_argv(argv)
+    if legacy_argv is not None:
+        print(
+            f"{parser.prog}: warning: --file with --add, --update, --rm, --sort, --refactor or --backup is deprecated, "
+            f"use: {parser.prog} {shlex.join(legacy_argv)}",
+            file=sys.stderr
+        )
+        argv = legacy_argv
+    args = parser.parse_args(argv)
+    if getattr(args, 'sort_by', None):
+        args.sort = True
+    elif hasattr(args, 'sort_by'):
+        args.sort_by = "name"
 
-    if args.refactor:
-        refactor_config_file(args.file)
+    from tools import commands
+
+    try:
+        return getattr(commands, args.handler)(args)
+    except commands.CommandError as error:
+        parser.error(str(error))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
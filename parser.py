@@ -1,13 +1,149 @@
 import re
-from typing import Tuple, Iterable
+from typing import Tuple, Iterable, Iterator, List, NamedTuple, BinaryIO
+
+from lazy_re import LazyPattern
+from lexer import BYTES_TOKEN_RE, SPACED_TOKEN_RE, TRIVIA_KINDS, WORD_KINDS
+
+
+class ConfSyntaxError(Exception):
+    ...
+
+
+class Node:
+    __slots__ = ("start", "end")
+
+    def __init__(self, start: int, end: int):
+        self.start = start
+        self.end = end
+
+    def get_source(self, lines: str) -> str:
+        return lines[self.start:self.end]
+
+
+class Statement(Node):
+    __slots__ = ("words",)
+
+    def __init__(self, words: List[str], start: int, end: int):
+        self.start = start
+        self.end = end
+        self.words = words
+
+
+class Block(Node):
+    __slots__ = ("words", "open_start", "depth", "children")
+
+    def __init__(self, words: List[str], start: int, open_start: int, depth: int = 0):
+        self.start = start
+        self.end = open_start + 1
+        self.words = words
+        self.open_start = open_start
+        self.depth = depth
+        self.children: List[Node] = []
+
+    @property
+    def keyword(self) -> str | None:
+        return self.words[0] if self.words else None
+
+    @property
+    def name(self) -> str | None:
+        return self.words[1] if len(self.words) > 1 else None
+
+    @property
+    def is_host(self) -> bool:
+        return self.keyword == "host" and self.name is not None
+
+    def get_statement_words(self) -> List[List[str]]:
+        # words of the statements and block headers inside the block in file order, nested blocks included
+        statements = []
+        for node in self.children:
+            statements.append(node.words)
+            if isinstance(node, Block):
+                statements += node.get_statement_words()
+        return statements
+
+
+class ConfDocument:
+    def __init__(self, lines: str, children: List[Node]):
+        self.lines = lines
+        self.children = children
+
+    def hosts(self, recursive: bool = True) -> Iterator[Block]:
+        stack = [iter(self.children)]
+        while stack:
+            node = next(stack[-1], None)
+            if node is None:
+                stack.pop()
+                continue
+            if not isinstance(node, Block):
+                continue
+            if node.is_host:
+                yield node
+            elif recursive:
+                stack.append(iter(node.children))
+
+    def find_host(self, name: str) -> Block | None:
+        for host in self.hosts():
+            if host.name == name:
+                return host
+        return None
+
+    def to_string(self) -> str:
+        # whitespace and comments are the gaps between the nodes
+        parts = []
+        pointer = 0
+        for node in self.children:
+            parts.append(self.lines[pointer:node.start])
+            parts.append(node.get_source(self.lines))
+            pointer = node.end
+        parts.append(self.lines[pointer:])
+        return "".join(parts)
+
+
+class HostFields(NamedTuple):
+    ethernet: str | None
+    is_deny_booting: bool
+    filenames: Tuple[str, ...]
+    fixed_addr: str | None
+    has_arch_condition: bool = False
+    # first words of the statements that are none of the fields above, e.g. "option" or "next-server"
+    other_statements: Tuple[str, ...] = ()
+
+    def get_condition_filenames(self) -> Tuple[str | None, str | None]:
+        # With more than two conditions the first one is "if" and the last one is "else"
+        if not self.filenames:
+            return None, None
+        if len(self.filenames) == 1:
+            return self.filenames[0], None
+        return self.filenames[0], self.filenames[-1]
+
+
+class ScannedBlock(NamedTuple):
+    words: List[str]
+    start: int
+    open_start: int
+    end: int
+    depth: int
+    source: bytes
+    # words of the statements and block headers inside the block
+    statements: List[List[str]] | None = None
+
+    @property
+    def name(self) -> str | None:
+        return self.words[1] if len(self.words) > 1 else None
 
 
 class ConfParser:
-    HOST_PATTERN = r"host\s\w+\s{"
-    ETHERNET_PATTERN = r"ethernet\s[\w:]+;"
-    FILENAME_PATTERN = r"filename\s\"[^\;]+"
-    FIXED_ADDR_PATTERN = r"fixed-address\s[^;]+"
-    DENY_BOOTING_PATTERN = r"deny\sbooting"
+    CHUNK_SIZE = 64 * 1024
+    HOST_PATTERN = r"host\s[\w.-]+\s{"
+    ETHERNET_PATTERN = r"hardware\s+ethernet\s+(?P<ethernet>[\w:]+)\s*;"
+    FILENAME_PATTERN = r"filename\s+\"(?P<filename>[^\"]*)\""
+    FIXED_ADDR_PATTERN = r"fixed-address\s+(?P<fixed_addr>[^;\s]+)"
+    DENY_BOOTING_PATTERN = r"(?P<deny_booting>deny\s+booting)"
+
+    ETHERNET_RE = LazyPattern(ETHERNET_PATTERN)
+    FILENAME_RE = LazyPattern(FILENAME_PATTERN)
+    FIXED_ADDR_RE = LazyPattern(FIXED_ADDR_PATTERN)
+    DENY_BOOTING_RE = LazyPattern(DENY_BOOTING_PATTERN)
 
     @staticmethod
     def _is_all_brackets_closed(lines: str) -> bool:
@@ -27,7 +163,127 @@ class ConfParser:
 
     @staticmethod
     def get_host_match(host_name: str, lines: str) -> re.Match:
-        return re.search(f"host\s{host_name}\s{{", lines)
+        return re.search(f"host\\s{re.escape(host_name)}\\s{{", lines)
+
+    @staticmethod
+    def parse(lines: str) -> ConfDocument:
+        # Whitespace and comments get no nodes, they are the text between the nodes' spans
+        root: List[Node] = []
+        parents: List[List[Node]] = []
+        children = root
+        words: List[str] = []
+        statement_start = last_word = None
+
+        for match in SPACED_TOKEN_RE.finditer(lines):
+            kind = match.lastgroup
+            if kind in TRIVIA_KINDS:
+                continue
+
+            if kind in WORD_KINDS:
+                if statement_start is None:
+                    statement_start = match.start(kind)
+                last_word = match
+                words.append(match.group(kind))
+                continue
+
+            if kind == "semicolon":
+                children.append(Statement(words, match.start(kind) if statement_start is None else statement_start,
+                                          match.end()))
+            elif kind == "open":
+                open_start = match.start(kind)
+                block = Block(words, open_start if statement_start is None else statement_start, open_start,
+                              len(parents))
+                children.append(block)
+                parents.append(children)
+                children = block.children
+            else:
+                if statement_start is not None:
+                    # statement without trailing ";" right before "}"
+                    children.append(Statement(words, statement_start, last_word.end()))
+                if not parents:
+                    raise ConfSyntaxError(f"Unexpected '}}' at position {match.start(kind)}")
+                children = parents.pop()
+                children[-1].end = match.end()
+            words = []
+            statement_start = None
+
+        if parents:
+            raise ConfSyntaxError(f"Block at position {parents[-1][-1].start} is not closed")
+        if statement_start is not None:
+            root.append(Statement(words, statement_start, last_word.end()))
+        return ConfDocument(lines, root)
+
+    @staticmethod
+    def iter_blocks(
+            fileobj: BinaryIO, keywords: Iterable[str] = ("host",), chunk_size: int = CHUNK_SIZE
+    ) -> Iterator[ScannedBlock]:
+        # Offsets are in bytes. Only the current statement and the currently open block
+        # are kept in memory, everything before them is dropped after each chunk.
+        keywords = set(keywords)
+        buffer = b""
+        buffer_offset = 0
+        pointer = 0
+        depth = 0
+        words: List[str] = []
+        statement_start = None
+        block = None
+        is_eof = False
+
+        while not is_eof:
+            chunk = fileobj.read(chunk_size)
+            is_eof = not chunk
+            buffer += chunk
+
+            for match in BYTES_TOKEN_RE.finditer(buffer, pointer):
+                if not is_eof and match.end() == len(buffer):
+                    # token can continue in the next chunk
+                    break
+                pointer = match.end()
+                kind = match.lastgroup
+                if kind in TRIVIA_KINDS:
+                    continue
+
+                if kind in WORD_KINDS:
+                    if statement_start is None:
+                        statement_start = buffer_offset + match.start()
+                    words.append(match.group().decode())
+                    continue
+
+                if kind == "open":
+                    if block is None and len(words) > 1 and words[0] in keywords:
+                        block = (words, statement_start, buffer_offset + match.start(), depth, [])
+                    elif block is not None and words:
+                        block[4].append(words)
+                    depth += 1
+                elif kind == "close":
+                    if block is not None and words:
+                        # statement without trailing ";" right before "}"
+                        block[4].append(words)
+                    depth -= 1
+                    if depth < 0:
+                        raise ConfSyntaxError(f"Unexpected '}}' at position {buffer_offset + match.start()}")
+                    if block is not None and block[3] == depth:
+                        block_words, start, open_start, _, statements = block
+                        end = buffer_offset + match.end()
+                        source = buffer[start - buffer_offset:match.end()]
+                        yield ScannedBlock(block_words, start, open_start, end, depth, source, statements)
+                        block = None
+                elif block is not None and words:
+                    block[4].append(words)
+                words = []
+                statement_start = None
+
+            keep_from = pointer
+            if statement_start is not None:
+                keep_from = min(keep_from, statement_start - buffer_offset)
+            if block is not None:
+                keep_from = min(keep_from, block[1] - buffer_offset)
+            buffer = buffer[keep_from:]
+            buffer_offset += keep_from
+            pointer -= keep_from
+
+        if depth:
+            raise ConfSyntaxError("Not all blocks are closed")
 
     @classmethod
     def get_host_boundaries(cls, host: re.Match, lines: str) -> Tuple[int, int]:
@@ -42,16 +298,59 @@ class ConfParser:
             _pointer = end_brackets_pointer
         return start_brackets_pointer, end_brackets_pointer
 
+    @staticmethod
+    def get_statement_words(lines: str) -> List[List[str]]:
+        # words of every statement and block header, unlike parse() it accepts unbalanced braces
+        statements = []
+        words = []
+        for match in SPACED_TOKEN_RE.finditer(lines):
+            kind = match.lastgroup
+            if kind in WORD_KINDS:
+                words.append(match.group(kind))
+            elif kind not in TRIVIA_KINDS and words:
+                statements.append(words)
+                words = []
+        if words:
+            statements.append(words)
+        return statements
+
     @classmethod
-    def get_ethernet(cls, host_lines: str) -> str:
-        return (
-            re.search(cls.ETHERNET_PATTERN, host_lines)
-            .group()
-            .replace("ethernet", "", 1)
-            .replace(";", "")
-            .replace(" ", "")
+    def get_fields(cls, host_lines: str, statements: Iterable[List[str]] | None = None) -> HostFields:
+        # `statements` are the words of the host's statements when the caller has them, e.g. from Block.children
+        if statements is None:
+            # the header of the host itself is not one of its statements
+            statements = [words for words in cls.get_statement_words(host_lines) if words[0] != "host"]
+        ethernet = fixed_addr = None
+        is_deny_booting = has_arch_condition = False
+        filenames = []
+        other_statements = []
+        for words in statements:
+            keyword = words[0]
+            if keyword == "hardware":
+                if ethernet is None and len(words) > 2 and words[1] == "ethernet":
+                    ethernet = words[2]
+            elif keyword == "filename":
+                if len(words) > 1 and words[1][0] == "\"":
+                    filenames.append(words[1][1:-1])
+            elif keyword == "fixed-address":
+                if fixed_addr is None and len(words) > 1:
+                    fixed_addr = words[1]
+            elif keyword == "deny":
+                if words[1:] == ["booting"]:
+                    is_deny_booting = True
+            elif keyword == "if" and words[1:3] == ["option", "arch"]:
+                has_arch_condition = True
+            elif keyword != "else":
+                # "else" is the header of the arch condition's else block
+                other_statements.append(keyword)
+        return HostFields(
+            ethernet, is_deny_booting, tuple(filenames), fixed_addr, has_arch_condition, tuple(other_statements)
         )
 
+    @classmethod
+    def get_ethernet(cls, host_lines: str) -> str:
+        return cls.ETHERNET_RE.search(host_lines).group("ethernet")
+
     @staticmethod
     def get_name(host: re.Match) -> str:
         return (
@@ -65,24 +364,12 @@ class ConfParser:
 
     @classmethod
     def is_deny_booting(cls, host_lines: str) -> bool:
-        return re.search(cls.DENY_BOOTING_PATTERN, host_lines) is not None
+        return cls.DENY_BOOTING_RE.search(host_lines) is not None
 
     @classmethod
-    def get_filenames(cls, host_lines: str):
-        re_filenames = re.finditer(cls.FILENAME_PATTERN, host_lines)
-        condition_true_filename, condition_false_filename = [(
-            re_filename.group()
-            .replace("filename", "", 1)
-            .replace("\"", "", 2)
-            .replace(" ", "")
-        ) for re_filename in re_filenames]
-        return condition_true_filename, condition_false_filename
+    def get_filenames(cls, host_lines: str) -> Tuple[str | None, str | None]:
+        return cls.get_fields(host_lines).get_condition_filenames()
 
     @classmethod
     def get_fixed_addr(cls, host_lines: str):
-        return (
-            re.search(cls.FIXED_ADDR_PATTERN, host_lines)
-            .group()
-            .replace("fixed-address", "", 1)
-            .replace(" ", "")
-        )
+        return cls.FIXED_ADDR_RE.search(host_lines).group("fixed_addr")
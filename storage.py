@@ -0,0 +1,164 @@
+import io
+import os
+import shutil
+import sys
+import tempfile
+from typing import BinaryIO, Iterable, TextIO
+
+
+def write_atomic(filename: str, data: bytes):
+    directory = os.path.dirname(os.path.abspath(filename))
+    fd, tmp_filename = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(filename)}.")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        if os.path.exists(filename):
+            shutil.copymode(filename, tmp_filename)
+        os.replace(tmp_filename, filename)
+    except BaseException:
+        os.unlink(tmp_filename)
+        raise
+
+
+def append_atomic(filename: str, parts: Iterable[str]):
+    # parts are streamed into a copy, which replaces the file only after the last one is written
+    directory = os.path.dirname(os.path.abspath(filename))
+    fd, tmp_filename = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(filename)}.")
+    os.close(fd)
+    try:
+        shutil.copy2(filename, tmp_filename)
+        with open(tmp_filename, "a", newline="") as f:
+            for part in parts:
+                f.write(part)
+        os.replace(tmp_filename, filename)
+    except BaseException:
+        os.unlink(tmp_filename)
+        raise
+
+
+def write_from_offset(filename: str, lines: str, offset: int, old_part: str, new_part: str,
+                      atomic: bool = False):
+    """Write `new_part` over `old_part` which starts at char `offset` of `lines`.
+
+    Same-size blocks are patched in place, otherwise only the tail starting at `offset`
+    is rewritten and the file is truncated. `atomic` writes a full copy next to the file
+    and replaces it instead.
+    """
+    if atomic:
+        write_atomic(filename, (lines[:offset] + new_part + lines[offset + len(old_part):]).encode())
+        return
+
+    byte_offset = len(lines[:offset].encode())
+    old_bytes = old_part.encode()
+    new_bytes = new_part.encode()
+    with open(filename, "r+b") as f:
+        f.seek(byte_offset)
+        if len(old_bytes) == len(new_bytes):
+            f.write(new_bytes)
+            return
+        f.write(new_bytes + lines[offset + len(old_part):].encode())
+        f.truncate()
+
+
+class Storage:
+    name = "<storage>"
+
+    def read(self) -> str:
+        raise NotImplementedError
+
+    def write(self, lines: str):
+        raise NotImplementedError
+
+    def append(self, parts: Iterable[str], atomic: bool = False):
+        raise NotImplementedError
+
+    def open_binary(self) -> BinaryIO:
+        raise NotImplementedError
+
+    def get_last_char(self) -> str:
+        raise NotImplementedError
+
+    def write_from(self, lines: str, offset: int, old_part: str, new_part: str, atomic: bool = False):
+        self.write(lines[:offset] + new_part + lines[offset + len(old_part):])
+
+    def __repr__(self):
+        return f"<{type(self).__name__} {self.name}>"
+
+
+class FileStorage(Storage):
+    def __init__(self, filename: str):
+        self.filename = filename
+        self.name = filename
+
+    def read(self) -> str:
+        with open(self.filename, "r", newline="") as f:
+            return f.read()
+
+    def write(self, lines: str):
+        with open(self.filename, "w", newline="") as f:
+            f.write(lines)
+
+    def append(self, parts: Iterable[str], atomic: bool = False):
+        if atomic:
+            append_atomic(self.filename, parts)
+            return
+        with open(self.filename, "a", newline="") as f:
+            for part in parts:
+                f.write(part)
+
+    def open_binary(self) -> BinaryIO:
+        return open(self.filename, "rb")
+
+    def get_last_char(self) -> str:
+        with open(self.filename, "rb") as f:
+            f.seek(0, os.SEEK_END)
+            if not f.tell():
+                return ""
+            f.seek(-1, os.SEEK_END)
+            return f.read(1).decode(errors="replace")
+
+    def write_from(self, lines: str, offset: int, old_part: str, new_part: str, atomic: bool = False):
+        write_from_offset(self.filename, lines, offset, old_part, new_part, atomic)
+
+
+class MemoryStorage(Storage):
+    name = "<memory>"
+
+    def __init__(self, lines: str = ""):
+        self.lines = lines
+
+    def read(self) -> str:
+        return self.lines
+
+    def write(self, lines: str):
+        self.lines = lines
+
+    def append(self, parts: Iterable[str], atomic: bool = False):
+        self.lines += "".join(parts)
+
+    def open_binary(self) -> BinaryIO:
+        return io.BytesIO(self.lines.encode())
+
+    def get_last_char(self) -> str:
+        return self.lines[-1:]
+
+
+class StdioStorage(MemoryStorage):
+    # Reads the whole config from stdin, changes stay in memory until flush() prints them to stdout
+    name = "<stdin>"
+
+    def __init__(self, stdin: TextIO | None = None, stdout: TextIO | None = None):
+        super().__init__((stdin or sys.stdin).read())
+        self.stdout = stdout or sys.stdout
+
+    def flush(self):
+        self.stdout.write(self.lines)
+        self.stdout.flush()
+
+
+def get_storage(target: "str | Storage") -> Storage:
+    if isinstance(target, Storage):
+        return target
+    if target == "-":
+        return StdioStorage()
+    return FileStorage(target)
@@ -0,0 +1,105 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from host import Host
+from tools.backup import BackupStore, BackupError
+
+
+class TestBackupStore(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.filename = os.path.join(self.directory, "dhcpd.conf")
+        self.hosts = [Host(f"srv{i}", f"00:00:00:00:00:{i:02X}", True) for i in range(50)]
+        self._write()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def _write(self) -> bytes:
+        data = "# hosts\n" + "\n".join(host.get_config_string() for host in self.hosts) + "\n"
+        with open(self.filename, "w") as f:
+            f.write(data)
+        return data.encode()
+
+    def test_restore(self):
+        store = BackupStore(self.filename)
+        versions = {}
+        for i in range(5):
+            data = self._write()
+            versions[store.create()] = data
+            self.hosts[i * 7].ethernet = f"11:11:11:11:11:{i:02X}"
+            del self.hosts[i * 3]
+
+        self.assertEqual(store.get_versions(), sorted(versions))
+        self.assertEqual(store.get_record(1)["kind"], "snapshot")
+        self.assertEqual(store.get_record(5)["kind"], "delta")
+        for version, data in versions.items():
+            self.assertEqual(store.get_data(version), data)
+
+        store.restore(2)
+        with open(self.filename, "rb") as f:
+            self.assertEqual(f.read(), versions[2])
+
+    def test_delta_stores_only_changed_hosts(self):
+        store = BackupStore(self.filename)
+        store.create()
+        self.hosts[10].ethernet = "22:22:22:22:22:22"
+        self._write()
+        store.create()
+
+        changes = store.get_record(2)["changes"]
+        self.assertEqual(len(changes), 1)
+        self.assertEqual(len(changes[0][2]), 1)
+        self.assertEqual(len(os.listdir(store.objects_path)), 2)
+
+    def test_manifest(self):
+        store = BackupStore(self.filename)
+        store.create()
+        self.hosts[10].ethernet = "22:22:22:22:22:22"
+        self._write()
+        with patch.object(BackupStore, "get_segments", side_effect=AssertionError("rebuilt")):
+            self.assertEqual(store.create(), 2)
+
+        # without the manifest the latest version is rebuilt once
+        os.unlink(store.manifest_path)
+        self.hosts[20].ethernet = "22:22:22:22:22:22"
+        data = self._write()
+        self.assertEqual(store.create(), 3)
+        self.assertEqual(store.get_data(3), data)
+        self.assertEqual(store.get_record(3)["kind"], "delta")
+        with patch.object(BackupStore, "get_segments", side_effect=AssertionError("rebuilt")):
+            self.assertIsNone(store.create())
+
+    def test_unchanged_file(self):
+        store = BackupStore(self.filename)
+        self.assertEqual(store.create(), 1)
+        self.assertIsNone(store.create())
+
+    def test_depth(self):
+        store = BackupStore(self.filename, depth=3)
+        versions = {}
+        for i in range(10):
+            self.hosts[i].ethernet = f"33:33:33:33:33:{i:02X}"
+            data = self._write()
+            versions[store.create()] = data
+
+        kept_versions = store.get_versions()
+        self.assertGreaterEqual(len(kept_versions), 3)
+        self.assertLess(len(kept_versions), 6)
+        self.assertEqual(kept_versions[-1], 10)
+        for version in kept_versions:
+            self.assertEqual(store.get_data(version), versions[version])
+        with self.assertRaises(BackupError):
+            store.get_data(1)
+
+    def test_diff(self):
+        store = BackupStore(self.filename)
+        store.create()
+        self.hosts[0].ethernet = "44:44:44:44:44:44"
+        self._write()
+        diff = store.diff(1)
+        self.assertIn("-    hardware ethernet 00:00:00:00:00:00;", diff)
+        self.assertIn("+    hardware ethernet 44:44:44:44:44:44;", diff)
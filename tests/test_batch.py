@@ -0,0 +1,55 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from host import Host, get_all_hosts_from_config_lines
+from tools.batch import Changeset, apply_changeset_to_files, expand_filenames
+
+
+class TestBatch(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        hosts = [Host("srv2", "22:22:22:22:22:22", True), Host("srv1", "11:11:11:11:11:11", True)]
+        self.lines = "\n".join(host.get_config_string() for host in hosts) + "\n"
+        self.filenames = []
+        for i in range(4):
+            filename = os.path.join(self.directory, f"site{i}.conf")
+            with open(filename, "w") as f:
+                f.write(self.lines if i != 3 else self.lines.replace("srv1", "srv3"))
+            self.filenames.append(filename)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def _get_host_names(self, filename: str):
+        with open(filename) as f:
+            return [host.name for host in get_all_hosts_from_config_lines(f.read())]
+
+    def test_expand_filenames(self):
+        pattern = os.path.join(self.directory, "site*.conf")
+        self.assertEqual(expand_filenames([pattern, self.filenames[0]]), self.filenames)
+
+    def test_apply_changeset_to_files(self):
+        results = apply_changeset_to_files(self.filenames, Changeset(rm=("srv1",), sort=True), workers=2)
+        self.assertEqual([result.filename for result in results], self.filenames)
+        self.assertEqual([result.is_ok for result in results], [True, True, True, False])
+        for filename in self.filenames[:3]:
+            self.assertEqual(self._get_host_names(filename), ["srv2"])
+
+        # failed file is left as it was and no temporary files are left
+        with open(self.filenames[3]) as f:
+            self.assertEqual(f.read(), self.lines.replace("srv1", "srv3"))
+        self.assertEqual(sorted(os.listdir(self.directory)), [os.path.basename(name) for name in self.filenames])
+
+    def test_apply_changeset_to_files_with_threads(self):
+        results = apply_changeset_to_files(self.filenames, Changeset(sort=True), workers=2, use_processes=False)
+        self.assertTrue(all(result.is_ok for result in results))
+        self.assertEqual(self._get_host_names(self.filenames[0]), ["srv1", "srv2"])
+
+    def test_backup_only_keeps_files(self):
+        inodes = [os.stat(filename).st_ino for filename in self.filenames]
+        results = apply_changeset_to_files(self.filenames, Changeset(backup=True), workers=1)
+        self.assertTrue(all(result.is_ok for result in results))
+        self.assertEqual([os.stat(filename).st_ino for filename in self.filenames], inodes)
+        self.assertTrue(os.path.isdir(f"{self.filenames[0]}.backups"))
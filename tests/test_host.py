@@ -1,5 +1,9 @@
+import os
 import unittest
-from host import Host, Hosts
+from io import StringIO
+from tempfile import NamedTemporaryFile
+
+from host import Host, Hosts, save_host_changes, iter_hosts, get_all_hosts_from_config_lines
 
 
 class TestHosts(unittest.TestCase):
@@ -35,3 +39,156 @@ class TestHosts(unittest.TestCase):
 
         # Test if find_by_name method returns None if host is not found
         self.assertIsNone(self.hosts.find_by_name("non-existent-host"))
+
+    def test_get_dirty_hosts(self):
+        parent_host = Host("srv1", "11:11:11:11:11:11", True)
+        child_host = Host("srv1alt1", "22:22:22:22:22:22", True)
+        other_host = Host("srv2", "33:33:33:33:33:33", True)
+        for host in (parent_host, child_host, other_host):
+            host.mark_clean()
+        self.hosts = Hosts([parent_host, child_host, other_host])
+        self.hosts.make_nested()
+        self.assertEqual(len(self.hosts.get_dirty_hosts()), 0)
+
+        other_host.ethernet = "33:33:33:33:33:33"
+        self.assertEqual(len(self.hosts.get_dirty_hosts()), 0)
+
+        child_host.ethernet = "44:44:44:44:44:44"
+        self.hosts.append(Host("srv3"))
+        self.assertEqual([host.name for host in self.hosts.get_dirty_hosts()], ["srv1alt1", "srv3"])
+
+    def test_sort_hosts(self):
+        self.hosts = Hosts([
+            Host("srv10", "00:00:00:00:00:0A", False, "a", "b", "10.0.0.2"),
+            Host("srv2", "00:00:00:00:01:00", False, "a", "b", "10.0.0.10"),
+            Host("srv2alt1", "00:00:00:00:00:01", True),
+            Host("srv2alt10", "00:00:00:00:00:02", False, "a", "b", "9.0.0.1"),
+            Host("srv2alt9", "00:00:00:00:00:03", False, "a", "b", "9.0.0.2"),
+            Host("srv1", "00:00:00:00:00:FF", True),
+        ])
+        self.hosts.make_nested()
+
+        def get_names():
+            return [(host.name, [child_host.name for child_host in host.child_hosts]) for host in self.hosts]
+
+        self.hosts.sort_hosts("name", sort_child=True)
+        self.assertEqual(
+            get_names(), [("srv1", []), ("srv10", []), ("srv2", ["srv2alt1", "srv2alt10", "srv2alt9"])]
+        )
+        self.hosts.sort_hosts("natural", sort_child=True)
+        self.assertEqual(
+            get_names(), [("srv1", []), ("srv2", ["srv2alt1", "srv2alt9", "srv2alt10"]), ("srv10", [])]
+        )
+        self.hosts.sort_hosts("ip", sort_child=True)
+        self.assertEqual(
+            get_names(), [("srv10", []), ("srv2", ["srv2alt10", "srv2alt9", "srv2alt1"]), ("srv1", [])]
+        )
+        self.hosts.sort_hosts("mac", sort_child=True)
+        self.assertEqual(
+            get_names(), [("srv10", []), ("srv1", []), ("srv2", ["srv2alt1", "srv2alt10", "srv2alt9"])]
+        )
+        with self.assertRaises(ValueError):
+            self.hosts.sort_hosts("size")
+
+    def test_render_to(self):
+        raw_host = Host("srv2alt1")
+        raw_host.set_raw_value("hardware ethernet 22:22:22:22:22:22;\ndeny booting;")
+        self.hosts = Hosts([
+            Host("srv2", "11:11:11:11:11:11", False, "srv2/ipxe64.efi", "srv2/undionly.kpxe", "10.0.0.2"),
+            Host("srv1", "33:33:33:33:33:33", True),
+            raw_host,
+        ])
+        self.hosts.make_nested()
+
+        output = StringIO()
+        self.hosts.render_to(output)
+        self.assertEqual(
+            output.getvalue(),
+            "".join(f"{host.get_config_string()}\n" for host in self.hosts.iter_all_hosts())
+        )
+
+        output = StringIO()
+        Hosts([raw_host]).render_to(output, use_raw=True, separator="\n\n")
+        self.assertEqual(output.getvalue(), f"{raw_host.get_config_string(use_raw=True)}\n\n")
+
+
+class TestSaveHostChanges(unittest.TestCase):
+    def setUp(self):
+        self.host1 = Host("srv1", "11:11:11:11:11:11", False, "srv1/ipxe64.efi", "srv1/undionly.kpxe", "10.0.0.1")
+        self.host2 = Host("srv2", "22:22:22:22:22:22", True)
+        self.host3 = Host("srv3", "33:33:33:33:33:33", True)
+        self.temp_file = NamedTemporaryFile(mode="w", delete=False)
+        self.temp_file.write("# header\n")
+        for host in (self.host1, self.host2, self.host3):
+            self.temp_file.write(host.get_config_string() + "\n")
+        self.temp_file.close()
+
+    def tearDown(self):
+        os.unlink(self.temp_file.name)
+
+    def _expected(self):
+        return "# header\n" + "".join(
+            host.get_config_string() + "\n" for host in (self.host1, self.host2, self.host3)
+        )
+
+    def _read(self):
+        with open(self.temp_file.name) as f:
+            return f.read()
+
+    def test_same_length_change(self):
+        self.host2.ethernet = "AA:AA:AA:AA:AA:AA"
+        save_host_changes(self.temp_file.name, self.host2)
+        self.assertEqual(self._read(), self._expected())
+
+    def test_longer_change(self):
+        self.host1.fixed_addr = "192.168.100.100"
+        save_host_changes(self.temp_file.name, self.host1)
+        self.assertEqual(self._read(), self._expected())
+
+    def test_shorter_change(self):
+        self.host1.condition_true_filename = "a.efi"
+        save_host_changes(self.temp_file.name, self.host1)
+        self.assertEqual(self._read(), self._expected())
+
+    def test_atomic_change(self):
+        self.host3.ethernet = "33:33:33:33:33:34"
+        self.host1.condition_false_filename = "srv1/other.kpxe"
+        save_host_changes(self.temp_file.name, self.host3, atomic=True)
+        save_host_changes(self.temp_file.name, self.host1, atomic=True)
+        self.assertEqual(self._read(), self._expected())
+
+
+class TestIterHosts(unittest.TestCase):
+    def setUp(self):
+        self.lines = """# host fake {
+group {
+    host srv1 {
+        hardware ethernet 11:11:11:11:11:11;
+        deny booting; # }
+    }
+}
+host srv-2.dc {
+    hardware ethernet 22:22:22:22:22:22;
+    if option arch = 00:07 {
+        filename "srv2/ipxe64.efi";
+    } else {
+        filename "srv2/undionly.kpxe";
+    }
+    fixed-address 10.0.0.2;
+}
+"""
+        self.temp_file = NamedTemporaryFile(mode="w", delete=False)
+        self.temp_file.write(self.lines)
+        self.temp_file.close()
+
+    def tearDown(self):
+        os.unlink(self.temp_file.name)
+
+    def test_iter_hosts(self):
+        expected = [
+            (host.name, host.span, host.get_config_string()) for host in get_all_hosts_from_config_lines(self.lines)
+        ]
+        self.assertEqual([name for name, *_ in expected], ["srv1", "srv-2.dc"])
+        for chunk_size in (1, 2, 7, 64, 4096):
+            hosts = iter_hosts(self.temp_file.name, chunk_size)
+            self.assertEqual([(host.name, host.span, host.get_config_string()) for host in hosts], expected)
@@ -0,0 +1,92 @@
+import unittest
+
+from host import Host, get_all_hosts_from_config_lines
+from host_types import HostType, HOST_TYPES, HOST_TYPES_BY_KEY, FILENAME_FIELD, register_host_type, \
+    detect_host_type, get_host_type_by_option
+from parser import ConfParser
+
+
+class TestHostTypes(unittest.TestCase):
+    def setUp(self):
+        self.lines = """host srv1 {
+    hardware ethernet 11:11:11:11:11:11;
+    deny booting;
+}
+host srv2 {
+    hardware ethernet 22:22:22:22:22:22;
+    if option arch = 00:07 {
+        filename "srv2/ipxe64.efi";
+    } else {
+        filename "srv2/undionly.kpxe";
+    }
+    fixed-address 10.0.0.2;
+}
+host srv3 {
+    hardware ethernet 33:33:33:33:33:33;
+    filename "srv3/ipxe64.efi";
+    fixed-address 10.0.0.3;
+}
+host srv4 {
+    hardware ethernet 44:44:44:44:44:44;
+    option host-name "srv4";
+}
+host srv5 {
+    hardware ethernet 55:55:55:55:55:55;
+    filename "srv5/ipxe64.efi";
+    fixed-address 10.0.0.5;
+    next-server 10.0.0.1;
+}
+"""
+
+    def test_detect_host_type(self):
+        hosts = get_all_hosts_from_config_lines(self.lines)
+        self.assertEqual(
+            [host.get_host_type() for host in hosts], ["deny_booting", "if_else", "uefi", "raw", "raw"]
+        )
+        uefi_host = hosts.find_by_name("srv3")
+        self.assertEqual(uefi_host.filename, "srv3/ipxe64.efi")
+        self.assertIsNone(uefi_host.condition_true_filename)
+        self.assertEqual(uefi_host.fixed_addr, "10.0.0.3")
+
+        raw_host = hosts.find_by_name("srv4")
+        self.assertEqual(raw_host.ethernet, "44:44:44:44:44:44")
+        self.assertEqual(
+            raw_host.get_config_string(),
+            'host srv4 {\n    hardware ethernet 44:44:44:44:44:44;\n    option host-name "srv4";\n}'
+        )
+        # a filename alone doesn't make a host uefi, other statements would be lost when it is rendered
+        self.assertIn("next-server 10.0.0.1;", hosts.find_by_name("srv5").get_config_string())
+
+    def test_render(self):
+        host = Host("srv3", "33:33:33:33:33:33", fixed_addr="10.0.0.3", filename="srv3/ipxe64.efi", host_type="uefi")
+        self.assertEqual(
+            host.get_config_string(),
+            'host srv3 {\n    hardware ethernet 33:33:33:33:33:33;\n    filename "srv3/ipxe64.efi";\n'
+            '    fixed-address 10.0.0.3;\n}'
+        )
+        host.is_deny_booting = True
+        self.assertEqual(host.get_host_type(), "deny_booting")
+
+    def test_register_host_type(self):
+        host_type = HostType(
+            "test_next_server",
+            "Next server",
+            "ns",
+            (FILENAME_FIELD,),
+            'next-server 10.0.0.1;\n    filename "{filename}";'
+        )
+        register_host_type(host_type, before="uefi")
+        try:
+            self.assertIs(get_host_type_by_option("NS"), host_type)
+            self.assertEqual(list(HOST_TYPES), ["raw", "deny_booting", "if_else", "test_next_server", "uefi"])
+            self.assertIs(
+                detect_host_type(ConfParser.get_fields('{ filename "a.efi"; next-server 10.0.0.2; }')), host_type
+            )
+            self.assertIsNone(detect_host_type(ConfParser.get_fields('{ next-server 10.0.0.1; }')))
+            with self.assertRaises(ValueError):
+                register_host_type(host_type)
+            with self.assertRaises(ValueError):
+                register_host_type(HostType("test_same", "Same", "sm", (FILENAME_FIELD,), host_type.body_template))
+        finally:
+            del HOST_TYPES[host_type.name]
+            del HOST_TYPES_BY_KEY[host_type.key]
@@ -0,0 +1,106 @@
+import json
+import os
+import unittest
+from io import StringIO
+from tempfile import NamedTemporaryFile
+
+from host import Host, get_all_hosts_from_config_lines
+from tools.inventory import export_hosts, import_hosts
+
+
+class TestInventory(unittest.TestCase):
+    def setUp(self):
+        self.hosts = [
+            Host("srv1", "11:11:11:11:11:11", False, "srv1/ipxe64.efi", "srv1/undionly.kpxe", "10.0.0.1"),
+            Host("srv1alt1", "22:22:22:22:22:22", True),
+        ]
+        self.temp_file = NamedTemporaryFile(mode="w", delete=False)
+        for host in self.hosts:
+            self.temp_file.write(host.get_config_string() + "\n")
+        self.temp_file.close()
+        self.import_file = NamedTemporaryFile(mode="w", delete=False)
+        self.import_file.close()
+
+    def tearDown(self):
+        os.unlink(self.temp_file.name)
+        os.unlink(self.import_file.name)
+
+    def _round_trip(self, file_format: str):
+        output = StringIO()
+        self.assertEqual(export_hosts(self.temp_file.name, output, file_format), 2)
+        self.assertEqual(len(import_hosts(self.import_file.name, StringIO(output.getvalue()), file_format)), 2)
+
+        with open(self.import_file.name) as f:
+            imported_hosts = get_all_hosts_from_config_lines(f.read())
+        self.assertEqual(
+            [host.get_config_string() for host in imported_hosts],
+            [host.get_config_string() for host in self.hosts]
+        )
+
+    def test_jsonl_round_trip(self):
+        self._round_trip("jsonl")
+
+    def test_csv_round_trip(self):
+        self._round_trip("csv")
+
+    def test_export_parent(self):
+        output = StringIO()
+        export_hosts(self.temp_file.name, output, "csv")
+        self.assertEqual(output.getvalue().splitlines()[2], "srv1alt1,22:22:22:22:22:22,,,,True,srv1,,deny_booting,")
+
+    def test_raw_host_round_trip(self):
+        raw_body = "hardware ethernet 33:33:33:33:33:33;\n    option host-name \"srv3\";"
+        with open(self.temp_file.name, "a") as f:
+            f.write(f"host srv3 {{\n    {raw_body}\n}}\n")
+        output = StringIO()
+        export_hosts(self.temp_file.name, output)
+        self.assertEqual(json.loads(output.getvalue().splitlines()[2])["raw"], raw_body)
+
+        import_hosts(self.import_file.name, StringIO(output.getvalue()))
+        with open(self.import_file.name) as f:
+            imported_hosts = get_all_hosts_from_config_lines(f.read())
+        self.assertEqual(imported_hosts.find_by_name("srv3").get_config_body(), raw_body)
+
+    def test_import_invalid_raw_host(self):
+        for raw in ("", "deny booting; }\nhost srv4 {", "deny booting; {"):
+            source = StringIO(json.dumps({"name": "srv3", "host_type": "raw", "raw": raw}) + "\n")
+            with self.assertRaisesRegex(ValueError, "Record 1: Raw value"):
+                import_hosts(self.import_file.name, source)
+
+    def test_import_existing_host(self):
+        source = StringIO('{"name": "srv1", "ethernet": "33:33:33:33:33:33", "is_deny_booting": true}\n')
+        with self.assertRaises(ValueError):
+            import_hosts(self.temp_file.name, source)
+
+    def test_import_invalid_ethernet(self):
+        source = StringIO('{"name": "srv3", "ethernet": "33:33", "is_deny_booting": true}\n')
+        with self.assertRaises(ValueError):
+            import_hosts(self.import_file.name, source)
+
+    def test_import_invalid_hostname(self):
+        for name in ('"a b {"', '"srv3;"', "null", '""'):
+            source = StringIO(f'{{"name": {name}, "ethernet": "33:33:33:33:33:33", "is_deny_booting": true}}\n')
+            with self.assertRaisesRegex(ValueError, "Record 1: Hostname"):
+                import_hosts(self.import_file.name, source)
+
+        source = StringIO("name,ethernet,is_deny_booting\n,33:33:33:33:33:33,true\n")
+        with self.assertRaisesRegex(ValueError, "Record 1: Hostname"):
+            import_hosts(self.import_file.name, source, "csv")
+
+    def test_import_invalid_types(self):
+        for line in ('{"name": 123}', '{"name": "srv3", "ethernet": 5, "is_deny_booting": true}',
+                     '{"name": "srv3", "ethernet": "33:33:33:33:33:33", "is_deny_booting": []}', '["srv3"]', '"srv3"'):
+            with self.assertRaisesRegex(ValueError, "Record 1: "):
+                import_hosts(self.import_file.name, StringIO(line + "\n"))
+
+    def test_import_is_all_or_nothing(self):
+        source = StringIO(
+            '{"name": "srv10", "ethernet": "33:33:33:33:33:33", "is_deny_booting": true}\n'
+            '{"name": "srv11", "ethernet": "bad", "is_deny_booting": true}\n'
+        )
+        with open(self.temp_file.name) as f:
+            lines = f.read()
+        with self.assertRaisesRegex(ValueError, "Record 2"):
+            import_hosts(self.temp_file.name, source)
+        with open(self.temp_file.name) as f:
+            self.assertEqual(f.read(), lines)
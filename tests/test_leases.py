@@ -0,0 +1,93 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from host import Host
+from leases import get_latest_leases, get_lease_reports, LeaseReport, CONFLICTING_LEASE, DENIED_HOST_LEASE, \
+    ADDRESS_TAKEN, UNUSED_RESERVATION
+
+
+class TestLeases(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.conf_filename = os.path.join(self.directory, "dhcpd.conf")
+        self.leases_filename = os.path.join(self.directory, "dhcpd.leases")
+        hosts = [
+            Host("srv1", "11:11:11:11:11:11", False, "srv1/ipxe64.efi", "srv1/undionly.kpxe", "10.0.0.1"),
+            Host("srv2", "22:22:22:22:22:22", False, "srv2/ipxe64.efi", "srv2/undionly.kpxe", "10.0.0.2"),
+            Host("srv3", "33:33:33:33:33:33", False, "srv3/ipxe64.efi", "srv3/undionly.kpxe", "10.0.0.3"),
+            Host("srv4", "44:44:44:44:44:44", True),
+        ]
+        with open(self.conf_filename, "w") as f:
+            f.write("\n".join(host.get_config_string() for host in hosts))
+        with open(self.leases_filename, "w") as f:
+            f.write("""# The format of this file is documented in the dhcpd.leases(5) manual page.
+lease 10.0.0.50 {
+  starts 4 2023/01/01 00:00:00;
+  ends 4 2023/01/01 12:00:00;
+  binding state free;
+  hardware ethernet 11:11:11:11:11:11;
+}
+lease 10.0.0.51 {
+  starts 4 2023/01/02 00:00:00;
+  ends 4 2023/01/02 12:00:00;
+  binding state active;
+  next binding state free;
+  hardware ethernet 11:11:11:11:11:11;
+  client-hostname "srv1";
+}
+lease 10.0.0.2 {
+  binding state active;
+  hardware ethernet 22:22:22:22:22:22;
+}
+lease 10.0.0.3 {
+  binding state active;
+  hardware ethernet aa:aa:aa:aa:aa:aa;
+}
+lease 10.0.0.52 {
+  binding state active;
+  hardware ethernet 44:44:44:44:44:44;
+}
+""")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_get_latest_leases(self):
+        leases = get_latest_leases(self.leases_filename)
+        self.assertEqual(len(leases), 4)
+        lease = leases["11:11:11:11:11:11"]
+        self.assertEqual(lease.ip, "10.0.0.51")
+        self.assertEqual(lease.binding_state, "active")
+        self.assertEqual(lease.starts, "4 2023/01/02 00:00:00")
+        self.assertEqual(lease.client_hostname, "srv1")
+
+    def test_address_given_to_another_mac(self):
+        with open(self.leases_filename, "w") as f:
+            f.write("""lease 10.0.0.9 {
+  binding state active;
+  hardware ethernet 11:11:11:11:11:11;
+}
+lease 10.0.0.1 {
+  binding state active;
+  hardware ethernet bb:bb:bb:bb:bb:bb;
+}
+lease 10.0.0.1 {
+  binding state active;
+  hardware ethernet 11:11:11:11:11:11;
+}
+""")
+        leases = get_latest_leases(self.leases_filename)
+        self.assertTrue(leases["11:11:11:11:11:11"].is_active)
+        self.assertFalse(leases["bb:bb:bb:bb:bb:bb"].is_active)
+        reports = get_lease_reports(self.conf_filename, self.leases_filename)
+        self.assertEqual([report for report in reports if report.host_name == "srv1"], [])
+
+    def test_get_lease_reports(self):
+        self.assertEqual(list(get_lease_reports(self.conf_filename, self.leases_filename)), [
+            LeaseReport(CONFLICTING_LEASE, "srv1", "11:11:11:11:11:11", "10.0.0.1", "10.0.0.51", "11:11:11:11:11:11"),
+            LeaseReport(UNUSED_RESERVATION, "srv3", "33:33:33:33:33:33", "10.0.0.3", None),
+            LeaseReport(ADDRESS_TAKEN, "srv3", "33:33:33:33:33:33", "10.0.0.3", "10.0.0.3", "aa:aa:aa:aa:aa:aa"),
+            LeaseReport(DENIED_HOST_LEASE, "srv4", "44:44:44:44:44:44", None, "10.0.0.52", "44:44:44:44:44:44"),
+        ])
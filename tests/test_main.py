@@ -0,0 +1,108 @@
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class TestMain(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.filename = os.path.join(self.directory, "dhcpd.conf")
+        with open(self.filename, "w") as f:
+            f.write("host srv2 {\n    hardware ethernet 22:22:22:22:22:22;\n    deny booting;\n}\n"
+                    "host srv1 {\n    hardware ethernet 11:11:11:11:11:11;\n    deny booting;\n}\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def _get_imported_modules(self, code: str):
+        result = subprocess.run(
+            [sys.executable, "-c", f"import sys\n{code}\nprint(' '.join(sys.modules))"],
+            cwd=ROOT, capture_output=True, text=True, check=True
+        )
+        return set(result.stdout.split())
+
+    def test_import_is_light(self):
+        modules = self._get_imported_modules("import main\nmain.get_parser().parse_args(['rm', 'srv1', '--file', 'x'])")
+        for module in ("host", "parser", "tools.cli", "tools.batch", "tools.backup", "concurrent.futures"):
+            self.assertNotIn(module, modules)
+
+    def test_command_imports_only_its_modules(self):
+        modules = self._get_imported_modules(f"import main\nmain.main(['rm', 'srv1', '--file', {self.filename!r}])")
+        self.assertIn("host", modules)
+        for module in ("tools.cli", "tools.batch", "tools.backup", "tools.inventory", "concurrent.futures"):
+            self.assertNotIn(module, modules)
+
+        with open(self.filename) as f:
+            self.assertNotIn("srv1", f.read())
+
+    def test_import_incremental_refactor(self):
+        import_filename = os.path.join(self.directory, "hosts.jsonl")
+        with open(import_filename, "w") as f:
+            f.write('{"name": "srv3", "ethernet": "33:33:33:33:33:33", "is_deny_booting": true}\n')
+        result = subprocess.run(
+            [sys.executable, "main.py", "import", import_filename, "--file", self.filename, "--refactor",
+             "--incremental"],
+            cwd=ROOT, capture_output=True, text=True
+        )
+        self.assertEqual(result.returncode, 0, result.stderr)
+
+        result = subprocess.run(
+            [sys.executable, "main.py", "check", "--file", self.filename], cwd=ROOT, capture_output=True, text=True
+        )
+        self.assertIn("host srv1 is not formatted", result.stdout)
+        self.assertNotIn("srv3", result.stdout)
+
+    def test_incremental_for_several_files(self):
+        other_filename = os.path.join(self.directory, "other.conf")
+        shutil.copy(self.filename, other_filename)
+        result = subprocess.run(
+            [sys.executable, "main.py", "refactor", "--file", self.filename, other_filename, "--incremental"],
+            cwd=ROOT, capture_output=True, text=True
+        )
+        self.assertEqual(result.returncode, 2)
+        self.assertIn("--incremental only for one file", result.stderr)
+
+    def test_legacy_flags(self):
+        import main
+
+        self.assertEqual(
+            main.get_legacy_argv(['--file', 'dhcpd.conf', '--rm', 'srv1', 'srv2', '--sort', '--backup']),
+            ['rm', 'srv1', 'srv2', '--file', 'dhcpd.conf', '--sort', '--backup']
+        )
+        self.assertEqual(
+            main.get_legacy_argv(['--file', 'dhcpd.conf', '--backup', '--refactor']),
+            ['refactor', '--file', 'dhcpd.conf', '--backup']
+        )
+        self.assertIsNone(main.get_legacy_argv(['rm', 'srv1', '--file', 'dhcpd.conf']))
+
+        result = subprocess.run(
+            [sys.executable, "main.py", "--file", self.filename, "--rm", "srv2", "--sort"],
+            cwd=ROOT, capture_output=True, text=True
+        )
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertIn("deprecated", result.stderr)
+        self.assertIn(f"rm srv2 --file {self.filename} --sort", result.stderr)
+        with open(self.filename) as f:
+            self.assertNotIn("srv2", f.read())
+
+    def test_pipe(self):
+        with open(self.filename) as f:
+            result = subprocess.run(
+                [sys.executable, "main.py", "sort", "--file", "-"], cwd=ROOT, stdin=f, capture_output=True, text=True
+            )
+        self.assertEqual(result.returncode, 0)
+        self.assertLess(result.stdout.index("srv1"), result.stdout.index("srv2"))
+
+        result = subprocess.run(
+            [sys.executable, "main.py", "leases", "dhcpd.leases", "--file", "-"], cwd=ROOT, capture_output=True
+        )
+        self.assertEqual(result.returncode, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
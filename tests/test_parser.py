@@ -1,7 +1,8 @@
+import io
 import unittest
 import re
 
-from parser import ConfParser
+from parser import ConfParser, ConfSyntaxError
 
 
 class TestConfParser(unittest.TestCase):
@@ -99,6 +100,41 @@ class TestConfParser(unittest.TestCase):
         self.assertEqual(true_filename, "srv2/ipxe64.efi")
         self.assertEqual(false_filename, "srv2/undionly.kpxe")
 
+    def test_get_filenames__not_two_filenames(self):
+        self.assertEqual(self.conf_parser.get_filenames(self.host_with_deny_booting), (None, None))
+        self.assertEqual(self.conf_parser.get_filenames('filename "uefi.efi";'), ("uefi.efi", None))
+        lines = 'if a { filename "a.efi"; } elsif b { filename "b.efi"; } else { filename "c.kpxe"; }'
+        self.assertEqual(self.conf_parser.get_filenames(lines), ("a.efi", "c.kpxe"))
+
+    def test_get_fields(self):
+        fields = self.conf_parser.get_fields(self.host)
+        self.assertEqual(fields.ethernet, "00:8C:FA:5B:0C:48")
+        self.assertFalse(fields.is_deny_booting)
+        self.assertEqual(fields.filenames, ("srv2/ipxe64.efi", "srv2/undionly.kpxe"))
+        self.assertEqual(fields.fixed_addr, "38.68.33.3")
+        self.assertTrue(fields.has_arch_condition)
+        self.assertEqual(fields.other_statements, ("option",))
+
+        fields = self.conf_parser.get_fields(self.host_with_deny_booting)
+        self.assertEqual(fields.ethernet, "F0:4D:A2:74:E0:4C")
+        self.assertTrue(fields.is_deny_booting)
+        self.assertEqual(fields.filenames, ())
+        self.assertIsNone(fields.fixed_addr)
+        self.assertFalse(fields.has_arch_condition)
+        self.assertEqual(fields.other_statements, ())
+
+    def test_get_fields_from_statement_words(self):
+        block, = self.conf_parser.parse(self.host).hosts()
+        host_lines = self.host[block.open_start:block.end]
+        self.assertEqual(
+            self.conf_parser.get_fields(host_lines, block.get_statement_words()), self.conf_parser.get_fields(self.host)
+        )
+        with io.BytesIO(self.host.encode()) as f:
+            scanned_block, = self.conf_parser.iter_blocks(f)
+        self.assertEqual(
+            self.conf_parser.get_fields(host_lines, scanned_block.statements), self.conf_parser.get_fields(self.host)
+        )
+
     def test_get_fixed_addr(self):
         fixed_addr = self.conf_parser.get_fixed_addr(self.host)
         self.assertEqual(fixed_addr, "38.68.33.3")
@@ -107,6 +143,66 @@ class TestConfParser(unittest.TestCase):
         with self.assertRaises(AttributeError):
             self.conf_parser.get_fixed_addr(self.host_with_deny_booting)
 
+    def test_get_host_match__escapes_name(self):
+        lines = "host srv1x2 {}\nhost srv1.2 {}"
+        host_match = self.conf_parser.get_host_match("srv1.2", lines)
+        self.assertEqual(host_match.group(), "host srv1.2 {")
+
+
+class TestConfParserParse(unittest.TestCase):
+    def setUp(self):
+        self.lines = """# global { comment with host fake {
+option domain-name "example.org";
+subnet 10.0.0.0 netmask 255.255.255.0 {
+    group {
+        host web-1.dc {
+            hardware ethernet 00:11:22:33:44:55;
+            deny booting; # trailing comment }
+        }
+    }
+}
+host srv2 {
+    hardware ethernet 00:8C:FA:5B:0C:48;
+    if option arch = 00:07 {
+        filename "srv2/ipxe64.efi";
+    } else {
+        filename "srv2/undionly.kpxe";
+    }
+    fixed-address 38.68.33.3;
+}
+"""
+
+    def test_round_trip(self):
+        document = ConfParser.parse(self.lines)
+        self.assertEqual(document.to_string(), self.lines)
+
+    def test_gaps_are_whitespace_and_comments(self):
+        stack = [ConfParser.parse(self.lines).children]
+        while stack:
+            nodes = stack.pop()
+            for node, next_node in zip(nodes, nodes[1:]):
+                self.assertRegex(self.lines[node.end:next_node.start], r"^(?:\s|#[^\n]*)*$")
+            stack.extend(node.children for node in nodes if hasattr(node, "children"))
+
+    def test_hosts(self):
+        document = ConfParser.parse(self.lines)
+        self.assertEqual([host.name for host in document.hosts()], ["web-1.dc", "srv2"])
+        self.assertEqual([host.name for host in document.hosts(recursive=False)], ["srv2"])
+
+    def test_host_spans(self):
+        document = ConfParser.parse(self.lines)
+        host = document.find_host("srv2")
+        self.assertTrue(host.get_source(self.lines).startswith("host srv2 {"))
+        self.assertTrue(host.get_source(self.lines).endswith("38.68.33.3;\n}"))
+        self.assertEqual(self.lines[host.open_start], "{")
+        self.assertIsNone(document.find_host("fake"))
+
+    def test_not_closed_block(self):
+        with self.assertRaises(ConfSyntaxError):
+            ConfParser.parse("host srv1 {")
+        with self.assertRaises(ConfSyntaxError):
+            ConfParser.parse("}")
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,66 @@
+import io
+import os
+import tempfile
+import unittest
+
+from host import Host, add_hosts, get_all_hosts_from_config_lines, iter_hosts
+from storage import FileStorage, MemoryStorage, StdioStorage, get_storage
+from tools.cli import refactor_config_file, remove_hosts_from_file, sort_hosts_in_file
+
+
+class TestStorage(unittest.TestCase):
+    def setUp(self):
+        hosts = [
+            Host("srv2", "22:22:22:22:22:22", True),
+            Host("srv1", "11:11:11:11:11:11", True),
+            Host("srv3", "33:33:33:33:33:33", True),
+        ]
+        self.lines = "\n".join(host.get_config_string() for host in hosts) + "\n"
+
+    def _get_host_names(self, lines: str):
+        return [host.name for host in get_all_hosts_from_config_lines(lines)]
+
+    def test_memory_storage(self):
+        storage = MemoryStorage(self.lines)
+        remove_hosts_from_file(storage, ["srv3"])
+        sort_hosts_in_file(storage)
+        self.assertEqual(self._get_host_names(storage.read()), ["srv1", "srv2"])
+        self.assertEqual([host.name for host in iter_hosts(storage)], ["srv1", "srv2"])
+
+        refactor_config_file(storage)
+        self.assertEqual(refactor_config_file(storage, check=True), [])
+        storage.write(storage.read().replace("hardware ethernet", "hardware   ethernet", 1))
+        self.assertEqual(refactor_config_file(storage, check=True), ["srv1"])
+        self.assertEqual(refactor_config_file(storage, ["srv1"]), ["srv1"])
+        self.assertEqual(refactor_config_file(storage, check=True), [])
+
+        self.assertEqual(len(add_hosts(storage, [Host("srv4", "44:44:44:44:44:44", True)])), 1)
+        self.assertEqual(self._get_host_names(storage.read()), ["srv1", "srv2", "srv4"])
+
+    def test_memory_storage_matches_file_storage(self):
+        fd, filename = tempfile.mkstemp()
+        self.addCleanup(os.unlink, filename)
+        with os.fdopen(fd, "w") as f:
+            f.write(self.lines)
+
+        file_storage = get_storage(filename)
+        memory_storage = MemoryStorage(self.lines)
+        self.assertIsInstance(file_storage, FileStorage)
+        for storage in (file_storage, memory_storage):
+            remove_hosts_from_file(storage, ["srv2"])
+            sort_hosts_in_file(storage)
+            refactor_config_file(storage)
+        self.assertEqual(file_storage.read(), memory_storage.read())
+
+    def test_stdio_storage(self):
+        output = io.StringIO()
+        storage = StdioStorage(io.StringIO(self.lines), output)
+        sort_hosts_in_file(storage)
+        self.assertEqual(output.getvalue(), "")
+
+        storage.flush()
+        self.assertEqual(self._get_host_names(output.getvalue()), ["srv1", "srv2", "srv3"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -7,7 +7,7 @@ from io import StringIO
 from tempfile import NamedTemporaryFile
 
 from host import Host, Hosts
-from tools.cli import add_new_host_with_cli, update_host_with_cli
+from tools.cli import add_new_host_with_cli, update_host_with_cli, refactor_config_file
 
 
 class TestAddNewHostWithCLI(unittest.TestCase):
@@ -68,6 +68,17 @@ class TestAddNewHostWithCLI(unittest.TestCase):
         self.assertIn('fixed-address 192.168.0.1;', lines)
         self.assertIn('host srv1', lines)
 
+    @patch('builtins.input', side_effect=['srv1', 'U', '00:11:22:33:44:55', 'uefi.efi', '192.168.0.1', ''])
+    def test_add_uefi_host(self, mock_input):
+        host = add_new_host_with_cli(self.hosts_file.name)
+
+        with open(self.hosts_file.name, 'r') as f:
+            lines = f.read()
+        self.assertEqual(host.host_type, 'uefi')
+        self.assertIn('filename "uefi.efi";', lines)
+        self.assertNotIn('if option arch', lines)
+        self.assertIn('fixed-address 192.168.0.1;', lines)
+
 
 class TestUpdateHostWithCli(unittest.TestCase):
     def setUp(self):
@@ -138,6 +149,17 @@ class TestUpdateHostWithCli(unittest.TestCase):
                     self.assertEqual(self.host1.condition_false_filename, condition_false_filename)
                     self.assertEqual(save_changes.call_count, 1)
 
+    def test_change_uefi_filename(self):
+        host = Host("test5", "55:55:55:55:55:55", fixed_addr="10.0.0.5", filename="uefi.efi", host_type="uefi")
+        self.hosts.append(host)
+        # menu of a uefi host: ethernet, deny booting, filename, fixed-address, raw, save
+        with patch('builtins.input', side_effect=['3', 'new.efi', '6']):
+            with patch('tools.cli.get_all_hosts_from_config_lines', return_value=self.hosts):
+                with patch('tools.cli.save_host_changes') as save_changes:
+                    update_host_with_cli(self.temp_file.name, host.name)
+                    self.assertEqual(host.filename, 'new.efi')
+                    self.assertEqual(save_changes.call_count, 1)
+
     def test_change_fixed_addr(self):
         fixed_addr = "255.255.255.255"
         with patch('builtins.input', side_effect=['5', fixed_addr, '7']):
@@ -228,3 +250,34 @@ class TestUpdateHostWithCli(unittest.TestCase):
                     self.assertIn(new_condition_true_filename, lines)
                     self.assertIn(new_condition_false_filename, lines)
                     self.assertIn(new_ethernet, lines)
+
+
+class TestRefactorConfigFile(unittest.TestCase):
+    def setUp(self):
+        self.formatted_host = "host srv1 {\n\thardware ethernet 11:11:11:11:11:11;\n\t\tdeny booting;\n}"
+        self.formatted_srv2_host = "host srv2 {\n\thardware ethernet 22:22:22:22:22:22;\n\t\tdeny booting;\n}"
+        self.unformatted_host = "host srv2 {  hardware ethernet 22:22:22:22:22:22;\n deny booting; }"
+        self.other_unformatted_host = "host srv3 {hardware ethernet 33:33:33:33:33:33; deny booting;}"
+        self.lines = f"{self.formatted_host}\n\n{self.unformatted_host}\n{self.other_unformatted_host}\n"
+        self.temp_file = NamedTemporaryFile(mode="w", delete=False)
+        self.temp_file.write(self.lines)
+        self.temp_file.close()
+
+    def tearDown(self):
+        os.unlink(self.temp_file.name)
+
+    def _read(self):
+        with open(self.temp_file.name) as f:
+            return f.read()
+
+    def test_check(self):
+        self.assertEqual(refactor_config_file(self.temp_file.name, check=True), ["srv2", "srv3"])
+        self.assertEqual(self._read(), self.lines)
+
+    def test_refactor_only_touched_hosts(self):
+        self.assertEqual(refactor_config_file(self.temp_file.name, ["srv1", "srv2"]), ["srv2"])
+        self.assertEqual(
+            self._read(),
+            f"{self.formatted_host}\n\n{self.formatted_srv2_host}\n{self.other_unformatted_host}\n"
+        )
+        self.assertEqual(refactor_config_file(self.temp_file.name, check=True), ["srv3"])
@@ -0,0 +1,110 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from host import Host
+from parser import ConfSyntaxError
+from tools.watch import ADDED, CHANGED, REMOVED, HostIndex, Watcher, index_segments
+
+
+class TestHostIndex(unittest.TestCase):
+    def setUp(self):
+        self.hosts = [Host(f"srv{i}", f"00:00:00:00:00:{i:02}", True) for i in range(1, 6)]
+        self.data = ("# hosts\n" + "\n".join(host.get_config_string() for host in self.hosts) + "\n").encode()
+        self.index = HostIndex(self.data)
+
+    def _get_events(self, data: bytes):
+        return sorted((event.kind, event.name) for event in self.index.update(data))
+
+    def _assert_same_as_full_index(self, data: bytes):
+        self.assertEqual(
+            [(segment.size, segment.digest, segment.host and segment.host.name) for segment in self.index.segments],
+            [(segment.size, segment.digest, segment.host and segment.host.name) for segment in index_segments(data)]
+        )
+
+    def test_update(self):
+        data = self.data.replace(b"00:00:00:00:00:03", b"00:00:00:00:00:33")
+        self.assertEqual(self._get_events(data), [(CHANGED, "srv3")])
+        self._assert_same_as_full_index(data)
+        self.assertEqual(self.index.hosts["srv3"].ethernet, "00:00:00:00:00:33")
+
+        data = data.replace(b"host srv2 ", b"host srv22 ") + b"host srv6 {\n    deny booting;\n}\n"
+        self.assertEqual(self._get_events(data), [(ADDED, "srv22"), (ADDED, "srv6"), (REMOVED, "srv2")])
+        self._assert_same_as_full_index(data)
+
+        self.assertEqual(self._get_events(data), [])
+
+    def test_update_in_group(self):
+        data = self.data.replace(b"host srv2 ", b"group {\nhost srv2 ").replace(b"host srv4 ", b"}\nhost srv4 ")
+        self.index = HostIndex(data)
+
+        # removing the closing brace of the group can't be seen from the changed region alone
+        new_data = data.replace(b"}\nhost srv4 ", b"host srv4 ")
+        with self.assertRaises(ConfSyntaxError):
+            self.index.update(new_data)
+        self._assert_same_as_full_index(data)
+
+        new_data = data.replace(b"00:00:00:00:00:03", b"00:00:00:00:00:33")
+        self.assertEqual(self._get_events(new_data), [(CHANGED, "srv3")])
+        self._assert_same_as_full_index(new_data)
+
+    def test_update_comment(self):
+        data = self.data + b"# note"
+        self.index = HostIndex(data)
+
+        # host appended to the unfinished comment is commented out too
+        data += b" host srv6 { deny booting; }"
+        self.assertEqual(self._get_events(data), [])
+        self._assert_same_as_full_index(data)
+
+        data = data.replace(b"# note host", b"# note\nhost")
+        self.assertEqual(self._get_events(data), [(ADDED, "srv6")])
+        self._assert_same_as_full_index(data)
+
+
+class TestWatcher(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.filename = os.path.join(self.directory, "dhcpd.conf")
+        with open(self.filename, "w") as f:
+            f.write(Host("srv1", "11:11:11:11:11:11", True).get_config_string() + "\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_poll(self):
+        watcher = Watcher(self.filename)
+        self.assertEqual(watcher.poll(), [])
+
+        with open(self.filename, "a") as f:
+            f.write("host srv2 {\n    hardware ethernet 22:22:22:22:22:22;\n")
+        with self.assertRaises(ConfSyntaxError):
+            watcher.poll()
+
+        with open(self.filename, "a") as f:
+            f.write("    deny booting;\n}\n")
+        events = watcher.poll()
+        self.assertEqual([(event.kind, event.name) for event in events], [(ADDED, "srv2")])
+        self.assertTrue(events[0].host.is_deny_booting)
+
+    def test_start_with_broken_file(self):
+        with open(self.filename, "a") as f:
+            f.write("host srv2 {\n")
+        watcher = Watcher(self.filename)
+        self.assertIsNone(watcher.index)
+        with self.assertRaises(ConfSyntaxError):
+            watcher.poll()
+
+        with open(self.filename, "a") as f:
+            f.write("    deny booting;\n}\n")
+        self.assertEqual(watcher.poll(), [])
+        self.assertEqual(sorted(watcher.index.hosts), ["srv1", "srv2"])
+
+        with open(self.filename, "a") as f:
+            f.write("host srv3 {\n    deny booting;\n}\n")
+        self.assertEqual([(event.kind, event.name) for event in watcher.poll()], [(ADDED, "srv3")])
+
+
+if __name__ == '__main__':
+    unittest.main()
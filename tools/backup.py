@@ -0,0 +1,230 @@
+import difflib
+import hashlib
+import io
+import json
+import os
+import time
+import zlib
+from typing import Dict, List, NamedTuple
+
+from parser import ConfParser, ConfSyntaxError
+from storage import write_atomic
+
+DEFAULT_DEPTH = 10
+
+
+class BackupError(Exception):
+    ...
+
+
+class Segment(NamedTuple):
+    digest: str
+    data: bytes
+
+
+def _create_segment(data: bytes) -> Segment:
+    return Segment(hashlib.sha256(data).hexdigest(), data)
+
+
+def split_segments(data: bytes) -> List[Segment]:
+    # Host blocks and the text between them, joined together they give back the file
+    segments = []
+    pointer = 0
+    try:
+        for block in ConfParser.iter_blocks(io.BytesIO(data)):
+            if block.start > pointer:
+                segments.append(_create_segment(data[pointer:block.start]))
+            segments.append(_create_segment(block.source))
+            pointer = block.end
+    except ConfSyntaxError:
+        return [_create_segment(data)] if data else []
+    if pointer < len(data):
+        segments.append(_create_segment(data[pointer:]))
+    return segments
+
+
+def get_segment_changes(old_digests: List[str], new_digests: List[str]) -> List[list]:
+    # [start, end, new digests] replacements of the old list, common head and tail are skipped first
+    head = 0
+    max_head = min(len(old_digests), len(new_digests))
+    while head < max_head and old_digests[head] == new_digests[head]:
+        head += 1
+    tail = 0
+    max_tail = max_head - head
+    while tail < max_tail and old_digests[-tail - 1] == new_digests[-tail - 1]:
+        tail += 1
+
+    old_middle = old_digests[head:len(old_digests) - tail]
+    new_middle = new_digests[head:len(new_digests) - tail]
+    changes = []
+    matcher = difflib.SequenceMatcher(None, old_middle, new_middle, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag != "equal":
+            changes.append([head + i1, head + i2, new_middle[j1:j2]])
+    return changes
+
+
+class BackupStore:
+    """Backups are compressed snapshots or host level changes against the previous backup.
+
+    Changed host blocks are stored once by sha256, a new snapshot starts every `depth` backups.
+    The segment digests of the latest backup are kept in a manifest, a new backup is compared with them.
+    """
+
+    def __init__(self, filename: str, depth: int = DEFAULT_DEPTH):
+        if depth < 1:
+            raise ValueError("Backup depth must be > 0")
+        self.filename = filename
+        self.depth = depth
+        self.path = f"{filename}.backups"
+        self.objects_path = os.path.join(self.path, "objects")
+        self.versions_path = os.path.join(self.path, "versions")
+        self.manifest_path = os.path.join(self.path, "manifest.json")
+
+    def get_versions(self) -> List[int]:
+        if not os.path.isdir(self.versions_path):
+            return []
+        return sorted(int(name.split(".")[0]) for name in os.listdir(self.versions_path) if name.endswith(".json"))
+
+    def get_record(self, version: int) -> Dict:
+        try:
+            with open(self._get_record_path(version), "r") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            raise BackupError(f"Backup {version} do not exist!") from None
+
+    def get_segments(self, version: int) -> List[Segment]:
+        chain = [self.get_record(version)]
+        while chain[-1]["kind"] != "snapshot":
+            chain.append(self.get_record(chain[-1]["parent"]))
+
+        segments = split_segments(self._read_object(chain.pop()["object"]))
+        while chain:
+            record = chain.pop()
+            new_segments = []
+            pointer = 0
+            for start, end, digests in record["changes"]:
+                new_segments.extend(segments[pointer:start])
+                new_segments.extend(Segment(digest, self._read_object(digest)) for digest in digests)
+                pointer = end
+            new_segments.extend(segments[pointer:])
+            segments = new_segments
+        return segments
+
+    def get_data(self, version: int) -> bytes:
+        return b"".join(segment.data for segment in self.get_segments(version))
+
+    def create(self) -> int | None:
+        with open(self.filename, "rb") as f:
+            data = f.read()
+
+        segments = split_segments(data)
+        versions = self.get_versions()
+        version = versions[-1] + 1 if versions else 1
+        record = {"version": version, "created": time.time(), "size": len(data)}
+
+        if versions:
+            parent_record = self.get_record(versions[-1])
+            changes = get_segment_changes(
+                self._get_latest_digests(versions[-1]), [segment.digest for segment in segments]
+            )
+            if not changes:
+                return None
+
+            new_segments = {segment.digest: segment.data for segment in segments}
+            changed_digests = {digest for *_, digests in changes for digest in digests}
+            new_objects = {
+                digest: zlib.compress(new_segments[digest])
+                for digest in changed_digests if not os.path.exists(self._get_object_path(digest))
+            }
+            chain = parent_record.get("chain", 0) + 1
+            changes_size = sum(map(len, new_objects.values())) + len(json.dumps(changes))
+            if chain < self.depth and (changes_size * 2 < len(data) or changes_size < len(zlib.compress(data))):
+                for digest, compressed in new_objects.items():
+                    self._write_object(digest, compressed)
+                record.update(kind="delta", parent=versions[-1], chain=chain, changes=changes)
+
+        if "kind" not in record:
+            digest = hashlib.sha256(data).hexdigest()
+            if not os.path.exists(self._get_object_path(digest)):
+                self._write_object(digest, zlib.compress(data))
+            record.update(kind="snapshot", chain=0, object=digest)
+
+        os.makedirs(self.versions_path, exist_ok=True)
+        with open(self._get_record_path(version), "w") as f:
+            json.dump(record, f)
+        self._write_manifest(version, [segment.digest for segment in segments])
+        self._prune()
+        return version
+
+    def restore(self, version: int):
+        write_atomic(self.filename, self.get_data(version))
+
+    def diff(self, version: int, other_version: int | None = None) -> str:
+        old_lines = self.get_data(version).decode().splitlines(keepends=True)
+        if other_version is None:
+            with open(self.filename, "rb") as f:
+                new_lines = f.read().decode().splitlines(keepends=True)
+            to_file = self.filename
+        else:
+            new_lines = self.get_data(other_version).decode().splitlines(keepends=True)
+            to_file = f"{self.filename}@{other_version}"
+        return "".join(difflib.unified_diff(old_lines, new_lines, f"{self.filename}@{version}", to_file))
+
+    def _prune(self):
+        versions = self.get_versions()
+        if len(versions) <= self.depth:
+            return
+
+        # the oldest kept backup needs its whole chain down to the snapshot
+        record = self.get_record(versions[-self.depth])
+        while record["kind"] != "snapshot":
+            record = self.get_record(record["parent"])
+        removed_versions = [version for version in versions if version < record["version"]]
+        if not removed_versions:
+            return
+        for version in removed_versions:
+            os.unlink(self._get_record_path(version))
+
+        used_digests = set()
+        for version in self.get_versions():
+            record = self.get_record(version)
+            if record["kind"] == "snapshot":
+                used_digests.add(record["object"])
+            else:
+                used_digests.update(digest for *_, digests in record["changes"] for digest in digests)
+        for name in os.listdir(self.objects_path):
+            if name not in used_digests:
+                os.unlink(os.path.join(self.objects_path, name))
+
+    def _get_latest_digests(self, version: int) -> List[str]:
+        try:
+            with open(self.manifest_path, "r") as f:
+                manifest = json.load(f)
+        except (FileNotFoundError, ValueError):
+            manifest = {}
+        if manifest.get("version") == version:
+            return manifest["digests"]
+
+        # no manifest or it was left by an interrupted backup, the version is rebuilt from its chain once
+        digests = [segment.digest for segment in self.get_segments(version)]
+        self._write_manifest(version, digests)
+        return digests
+
+    def _write_manifest(self, version: int, digests: List[str]):
+        write_atomic(self.manifest_path, json.dumps({"version": version, "digests": digests}).encode())
+
+    def _get_record_path(self, version: int) -> str:
+        return os.path.join(self.versions_path, f"{version:08d}.json")
+
+    def _get_object_path(self, digest: str) -> str:
+        return os.path.join(self.objects_path, digest)
+
+    def _read_object(self, digest: str) -> bytes:
+        with open(self._get_object_path(digest), "rb") as f:
+            return zlib.decompress(f.read())
+
+    def _write_object(self, digest: str, compressed: bytes):
+        os.makedirs(self.objects_path, exist_ok=True)
+        with open(self._get_object_path(digest), "wb") as f:
+            f.write(compressed)
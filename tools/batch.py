@@ -0,0 +1,111 @@
+import glob
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import partial
+from typing import Callable, Iterable, Iterator, List, NamedTuple, Tuple
+
+from host import delete_host_names
+from tools.backup import BackupStore, DEFAULT_DEPTH
+from tools.cli import refactor_config_file, sort_hosts_in_file
+
+DEFAULT_WORKERS = min(8, os.cpu_count() or 1)
+
+
+class Changeset(NamedTuple):
+    rm: Tuple[str, ...] = ()
+    sort: bool = False
+    sort_by: str = "name"
+    refactor: bool = False
+    backup: bool = False
+    backup_depth: int = DEFAULT_DEPTH
+
+    @property
+    def changes_file(self) -> bool:
+        return bool(self.rm or self.sort or self.refactor)
+
+
+class FileResult(NamedTuple):
+    filename: str
+    error: str | None = None
+
+    @property
+    def is_ok(self) -> bool:
+        return self.error is None
+
+
+def expand_filenames(patterns: Iterable[str]) -> List[str]:
+    filenames = []
+    for pattern in patterns:
+        if glob.has_magic(pattern):
+            filenames.extend(sorted(glob.glob(pattern)))
+        else:
+            filenames.append(pattern)
+    return list(dict.fromkeys(filenames))
+
+
+@contextmanager
+def atomic_copy(filename: str) -> Iterator[str]:
+    # Changes go to a copy next to the file, which replaces the file only if all of them succeed
+    directory = os.path.dirname(os.path.abspath(filename))
+    fd, tmp_filename = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(filename)}.")
+    os.close(fd)
+    try:
+        shutil.copy2(filename, tmp_filename)
+        yield tmp_filename
+        os.replace(tmp_filename, filename)
+    except BaseException:
+        os.unlink(tmp_filename)
+        raise
+
+
+def apply_changeset(filename: str, changeset: Changeset):
+    if changeset.backup:
+        BackupStore(filename, changeset.backup_depth).create()
+    if not changeset.changes_file:
+        # backup only, the file keeps its inode and mtime
+        return
+
+    with atomic_copy(filename) as work_filename:
+        if changeset.rm:
+            delete_host_names(work_filename, list(changeset.rm))
+        if changeset.sort:
+            sort_hosts_in_file(work_filename, changeset.sort_by)
+        if changeset.refactor:
+            refactor_config_file(work_filename)
+
+
+def _apply(operation: Callable[[str], None], filename: str) -> FileResult:
+    try:
+        operation(filename)
+    except Exception as error:
+        return FileResult(filename, f"{type(error).__name__}: {error}")
+    return FileResult(filename)
+
+
+def apply_to_files(
+        filenames: Iterable[str],
+        operation: Callable[[str], None],
+        workers: int = DEFAULT_WORKERS,
+        use_processes: bool = True
+) -> List[FileResult]:
+    # Parsing holds the GIL, so only processes change files in parallel. `operation` must be picklable
+    # (e.g. a partial of a module function) when processes are used.
+    filenames = list(filenames)
+    workers = max(1, min(workers, len(filenames)))
+    if workers == 1:
+        return [_apply(operation, filename) for filename in filenames]
+    executor_class = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+    with executor_class(max_workers=workers) as executor:
+        return list(executor.map(partial(_apply, operation), filenames))
+
+
+def apply_changeset_to_files(
+        filenames: Iterable[str],
+        changeset: Changeset,
+        workers: int = DEFAULT_WORKERS,
+        use_processes: bool = True
+) -> List[FileResult]:
+    return apply_to_files(filenames, partial(apply_changeset, changeset=changeset), workers, use_processes)
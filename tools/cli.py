@@ -1,49 +1,41 @@
-from typing import List
+from typing import Iterable, List
 
-from host import get_all_hosts_from_config_lines, Host, add_host, delete_host_names, save_host_changes, EmptyRawError
+from host import get_all_hosts_from_config_lines, get_host_from_block, Host, Hosts, add_host, delete_host_names, \
+    save_host_changes, EmptyRawError
+from host_types import HOST_TYPES, RAW, HostField, ETHERNET_FIELD, get_host_type, get_host_type_by_option
 from parser import ConfParser
+from storage import Storage, get_storage
 from tools.input import multiple_line_input
-from tools.refactoring import normalize_text, normalize_new_lines
-from tools.validators import validate_new_hostname, validate_ethernet, validate_host_pattern_option, validate_filename, \
-    validate_ipv4_address
+from tools.refactoring import normalize_new_lines, format_text, format_host_block
+from tools.validators import validate_new_hostname, validate_host_pattern_option, validate_host_field
 
 
-def _get_ethernet():
+def _get_field(field: HostField) -> str:
     while True:
-        ethernet = input("Ethernet: ").strip()
+        value = input(f"{field.label}: ").strip()
         try:
-            validate_ethernet(ethernet)
+            validate_host_field(field, value)
             break
         except ValueError as error:
             print(f"Error: {error}\n")
-    return ethernet
+    return value
 
 
-def _get_condition_filename(condition: str):
-    while True:
-        condition_filename = input(f"{condition} filename: ").strip()
-        try:
-            validate_filename(condition_filename)
-            break
-        except ValueError as error:
-            print(f"Error: {error}\n")
-    return condition_filename
+TOGGLE_DENY_BOOTING = "Toggle deny booting"
+SET_RAW_VALUE = "Set raw value"
+SAVE_AND_EXIT = "Save and exit"
 
 
-def _get_fixed_addr():
-    while True:
-        fixed_addr = input("fixed-address: ").strip()
-        try:
-            validate_ipv4_address(fixed_addr)
-            break
-        except ValueError as error:
-            print(f"Error: {error}\n")
-    return fixed_addr
+def _get_update_options(host: Host) -> List[HostField | str]:
+    # fields of the type the host boots with, so a deny booting host can get them before booting is allowed.
+    # Ethernet is the first field of every type but raw, deny booting is toggled right after it.
+    fields = get_host_type(host.get_booting_host_type()).fields
+    return [*fields[:1], TOGGLE_DENY_BOOTING, *fields[1:], SET_RAW_VALUE, SAVE_AND_EXIT]
 
 
-def add_new_host_with_cli(filename: str):
-    with open(filename) as f:
-        lines = f.read()
+def add_new_host_with_cli(filename: str | Storage) -> Host:
+    storage = get_storage(filename)
+    lines = storage.read()
 
     hosts = get_all_hosts_from_config_lines(lines)
     while True:
@@ -55,49 +47,37 @@ def add_new_host_with_cli(filename: str):
             print(f"Error: {error}\n")
 
     print("\nHost pattern options:")
-    print("1) Raw (R)")
-    print("2) Deny booting (D)")
-    print("3) If-else filenames (IE)")
+    for number, host_type in enumerate(HOST_TYPES.values(), start=1):
+        print(f"{number}) {host_type.title} ({host_type.option.upper()})")
+    options = "/".join(host_type.option.upper() for host_type in HOST_TYPES.values())
     while True:
-        host_pattern = input("Host pattern (R/D/IE): ").lower().strip()
+        host_pattern = input(f"Host pattern ({options}): ").lower().strip()
         try:
             validate_host_pattern_option(host_pattern)
             break
         except ValueError as error:
             print(f"Error: {error}\n")
 
-    if host_pattern == "r":
+    host_type = get_host_type_by_option(host_pattern)
+    if host_type is RAW:
         print("""Warning! We don't validate RAW value,
     but lines at least must contain 'deny booting;' or 'hardware ethernet', if-else filenames and fixed-address
     Raw config value: """)
         raw = multiple_line_input(with_left_strip=True)
         host = Host(name=hostname)
         host.set_raw_value(raw)
-        add_host(filename, host, use_raw=True)
-
-    elif host_pattern == "d":
-        ethernet = _get_ethernet()
-        host = Host(name=hostname, ethernet=ethernet, is_deny_booting=True)
-        add_host(filename, host)
-    elif host_pattern == "ie":
-        ethernet = _get_ethernet()
-        condition_true_filename = _get_condition_filename("if option arch = 00:07")
-        condition_false_filename = _get_condition_filename("else")
-        fixed_addr = _get_fixed_addr()
-
-        host = Host(
-            name=hostname,
-            ethernet=ethernet,
-            condition_true_filename=condition_true_filename,
-            condition_false_filename=condition_false_filename,
-            fixed_addr=fixed_addr
-        )
-        add_host(filename, host)
-
-
-def update_host_with_cli(filename: str, hostname: str):
-    with open(filename) as f:
-        lines = f.read()
+        add_host(storage, host, use_raw=True)
+        return host
+
+    values = {field.attribute: _get_field(field) for field in host_type.fields}
+    host = Host(name=hostname, host_type=host_type.name, **host_type.defaults, **values)
+    add_host(storage, host)
+    return host
+
+
+def update_host_with_cli(filename: str | Storage, hostname: str) -> Host | None:
+    storage = get_storage(filename)
+    lines = storage.read()
 
     hosts = get_all_hosts_from_config_lines(lines)
     host = hosts.find_by_name(hostname)
@@ -108,21 +88,18 @@ def update_host_with_cli(filename: str, hostname: str):
     while True:
         print(f"\nCurrent host configuration:\n{host.get_config_string()}")
         print("\nChoose an option:")
-        print("1. Change Ethernet")
-        print("2. Toggle deny booting")
-        print("3. Change condition true filename")
-        print("4. Change condition false filename")
-        print("5. Change fixed address")
-        print("6. Set raw value")
-        print("7. Save and exit")
+        options = {str(number): option for number, option in enumerate(_get_update_options(host), start=1)}
+        for number, option in options.items():
+            print(f"{number}. {option if isinstance(option, str) else f'Change {option.label}'}")
         print("e. Exit without saving")
 
         action = input("Option: ").strip().lower()
+        option = options.get(action)
 
-        if action.lower() == "e":
-            break
+        if action == "e":
+            return None
 
-        if action == "7":
+        if option == SAVE_AND_EXIT:
             try:
                 print(f"Raw: \n{host.get_config_string(True)}")
                 print(f"Not raw: \n{host.get_config_string(False)}")
@@ -137,110 +114,101 @@ def update_host_with_cli(filename: str, hostname: str):
             except EmptyRawError:
                 use_raw = False
 
-            save_host_changes(filename, host, use_raw)
-            break
+            save_host_changes(storage, host, use_raw)
+            return host
 
-        if action == "1":
-            ethernet = _get_ethernet()
-            host.ethernet = ethernet
-        elif action == "2":
+        if isinstance(option, HostField):
+            setattr(host, option.attribute, _get_field(option))
+        elif option == TOGGLE_DENY_BOOTING:
             host.is_deny_booting = not host.is_deny_booting
             if not host.is_deny_booting:
-                condition_true_filename = _get_condition_filename("if option arch = 00:07")
-                host.condition_true_filename = condition_true_filename
-
-                condition_false_filename = _get_condition_filename("else")
-                host.condition_false_filename = condition_false_filename
-
-                fixed_addr = _get_fixed_addr()
-                host.fixed_addr = fixed_addr
-        elif action == "3":
-            condition_true_filename = _get_condition_filename("if option arch = 00:07")
-            host.condition_true_filename = condition_true_filename
-        elif action == "4":
-            condition_false_filename = _get_condition_filename("else")
-            host.condition_false_filename = condition_false_filename
-        elif action == "5":
-            fixed_addr = _get_fixed_addr()
-            host.fixed_addr = fixed_addr
-        elif action == "6":
+                for field in get_host_type(host.get_booting_host_type()).fields:
+                    if field != ETHERNET_FIELD:
+                        setattr(host, field.attribute, _get_field(field))
+        elif option == SET_RAW_VALUE:
             print("""\nWarning! We don't validate RAW value,
-                    but lines at least must contain 'deny booting;' or 'hardware ethernet', if-else filenames and fixed-address\nRaw config value: """)
+    but lines at least must contain 'deny booting;' or 'hardware ethernet', if-else filenames and fixed-address
+    Raw config value: """)
             raw = multiple_line_input(with_left_strip=True)
             host.set_raw_value(raw)
         else:
             print(f"Invalid option: {action}")
 
 
-def remove_hosts_from_file(filename: str, host_names: List[str]):
-    with open(filename) as f:
-        lines = f.read()
+def remove_hosts_from_file(filename: str | Storage, host_names: List[str]):
+    storage = get_storage(filename)
+    lines = storage.read()
 
     hosts = get_all_hosts_from_config_lines(lines)
     for hostname in host_names:
         if hosts.find_by_name(hostname) is None:
             raise ValueError(f"Host {hostname} do not exist!")
-    delete_host_names(filename, host_names)
-
-
-def refactor_config_file(filename: str):
-    # read config and create backup file
-    with open(filename, "r") as f:
-        lines = f.read()
-
-    normalized = normalize_text(lines)
-
-    new_lines = ""
-    tabs_count = 0
-    for word in normalized.split():
-        if word in ["host", "subnet"]:
-            new_lines += "\n"
-
-        if new_lines and new_lines[-1] == "\n":
-            new_lines += "\t" * tabs_count
-
-        if word == "{":
-            tabs_count += 1
-            new_lines += f"{word}\n"
-            continue
-
-        if word == "}":
-            if new_lines[-1] == "\t":
-                new_lines = new_lines[:-1]
-            tabs_count -= 1
-            new_lines += f"{word}\n"
+    delete_host_names(storage, host_names)
+
+
+def refactor_config_file(
+        filename: str | Storage,
+        host_names: Iterable[str] | None = None,
+        check: bool = False
+) -> List[str]:
+    storage = get_storage(filename)
+    if check and host_names is None:
+        unformatted_host_names = []
+        with storage.open_binary() as f:
+            for block in ConfParser.iter_blocks(f):
+                source = block.source.decode()
+                if format_host_block(source, block.depth) != source:
+                    unformatted_host_names.append(block.name)
+        return unformatted_host_names
+
+    lines = storage.read()
+
+    if host_names is None and not check:
+        storage.write(format_text(lines))
+        return []
+
+    names = None if host_names is None else set(host_names)
+    unformatted = []
+    for block in ConfParser.parse(lines).hosts():
+        if names is not None and block.name not in names:
             continue
+        formatted = format_host_block(block.get_source(lines), block.depth)
+        if formatted != block.get_source(lines):
+            unformatted.append((block, formatted))
+
+    if check or not unformatted:
+        return [block.name for block, _ in unformatted]
+
+    offset = unformatted[0][0].start
+    pointer = offset
+    new_lines = []
+    for block, formatted in unformatted:
+        new_lines.append(lines[pointer:block.start])
+        new_lines.append(formatted)
+        pointer = block.end
+    storage.write_from(lines, offset, lines[offset:pointer], "".join(new_lines))
+    return [block.name for block, _ in unformatted]
+
+
+def sort_hosts_in_file(filename: str | Storage, sort_by: str = "name"):
+    storage = get_storage(filename)
+    lines = storage.read()
+
+    blocks = list(ConfParser.parse(lines).hosts(recursive=False))
+    hosts = Hosts(get_host_from_block(block, lines) for block in blocks)
+    hosts.make_nested()
+    hosts.sort_hosts(sort_by, sort_child=True)
 
-        if ";" in word:
-            new_lines += f"{word}\n"
-            continue
-
-        if word == "deny":
-            new_lines += "\t"
-
-        new_lines += f"{word} "
-
-    with open(filename, "w") as f:
-        f.write(new_lines)
-
-
-def sort_hosts_in_file(filename: str):
-    with open(filename, "r") as f:
-        lines = f.read()
+    rest_lines = ""
+    pointer = 0
+    for block in blocks:
+        rest_lines += lines[pointer:block.start]
+        pointer = block.end
+    rest_lines += lines[pointer:]
 
-    hosts = get_all_hosts_from_config_lines(lines)
-    hosts.make_nested()
-    hosts.sort_hosts_by_name(sort_child=True)
     new_host_lines = ""
     for host in hosts:
-        re_host = ConfParser.get_host_match(host.name, lines)
-        *_, end = ConfParser.get_host_boundaries(re_host, lines)
-        new_host_lines += f"\n\n{lines[re_host.start(): end]}"
-        lines = lines[:re_host.start()] + lines[end:]
-        for child_host in host.child_hosts:
-            re_child_host = ConfParser.get_host_match(child_host.name, lines)
-            *_, end = ConfParser.get_host_boundaries(re_child_host, lines)
-            new_host_lines += f"\n\n{lines[re_child_host.start(): end]}"
-            lines = lines[:re_child_host.start()] + lines[end:]
-    with open(filename, "w") as f:
-        f.write(f"{normalize_new_lines(lines)}{new_host_lines}\n")
+        for sorted_host in [host, *host.child_hosts]:
+            start, end = sorted_host.span
+            new_host_lines += f"\n\n{lines[start:end]}"
+    storage.write(f"{normalize_new_lines(rest_lines)}{new_host_lines}\n")
@@ -0,0 +1,210 @@
+import glob
+import os
+import sys
+import time
+from argparse import Namespace
+from typing import Callable, Iterable, List
+
+# Handlers of main.py subcommands import their modules on their own, so a call pays only for its command
+
+
+class CommandError(Exception):
+    pass
+
+
+def get_filenames(args: Namespace, multiple: bool = False, piped: bool = False) -> List[str]:
+    filenames = args.file
+    if len(filenames) != 1 or glob.has_magic(filenames[0]):
+        from tools.batch import expand_filenames
+        filenames = expand_filenames(filenames)
+
+    if not filenames:
+        raise CommandError("No files matched")
+    if "-" in filenames and not (piped and len(filenames) == 1):
+        raise CommandError(f"{args.command} doesn't support config from stdin")
+    if len(filenames) != 1 and not multiple:
+        raise CommandError(f"{args.command} supports only one file")
+    for filename in filenames:
+        if filename != "-" and not os.path.exists(filename):
+            raise CommandError(f"{filename} not exist. Please check for typo!!")
+    return filenames
+
+
+def get_backup_store(filename: str, depth: int | None):
+    from tools.backup import BackupStore, DEFAULT_DEPTH
+    return BackupStore(filename, DEFAULT_DEPTH if depth is None else depth)
+
+
+def _apply_to_files(args: Namespace, filenames: List[str], rm: Iterable[str] = ()) -> int:
+    # commands that change several files add and update no hosts, so there is nothing to refactor incrementally
+    if args.incremental:
+        raise CommandError(f"{args.command} supports --incremental only for one file")
+    from tools.backup import DEFAULT_DEPTH
+    from tools.batch import Changeset, apply_changeset_to_files, DEFAULT_WORKERS
+
+    backup_depth = DEFAULT_DEPTH if args.backup_depth is None else args.backup_depth
+    changeset = Changeset(tuple(rm), args.sort, args.sort_by, args.refactor, args.backup, backup_depth)
+    workers = DEFAULT_WORKERS if args.workers is None else args.workers
+    results = apply_changeset_to_files(filenames, changeset, workers, not args.threads)
+    for result in results:
+        print(f"{result.filename}: {'ok' if result.is_ok else result.error}")
+    failed_count = sum(not result.is_ok for result in results)
+    print(f"{len(results) - failed_count} succeeded, {failed_count} failed")
+    return 1 if failed_count else 0
+
+
+def _change(
+        args: Namespace,
+        action: Callable | None = None,
+        multiple: bool = False,
+        piped: bool = False,
+        rm: Iterable[str] = ()
+) -> int:
+    # --backup runs before the action, --sort and --refactor after it
+    filenames = get_filenames(args, multiple, piped and not args.backup)
+    if len(filenames) != 1:
+        return _apply_to_files(args, filenames, rm)
+
+    from storage import StdioStorage, get_storage
+
+    storage = get_storage(filenames[0])
+    if args.backup:
+        get_backup_store(filenames[0], args.backup_depth).create()
+
+    touched_names = action(storage) if action is not None else []
+    if args.sort:
+        from tools.cli import sort_hosts_in_file
+        sort_hosts_in_file(storage, args.sort_by)
+    if args.refactor:
+        from tools.cli import refactor_config_file
+        if args.incremental:
+            refactor_config_file(storage, touched_names)
+        else:
+            refactor_config_file(storage)
+
+    if isinstance(storage, StdioStorage):
+        storage.flush()
+    return 0
+
+
+def run_add(args: Namespace) -> int:
+    from tools.cli import add_new_host_with_cli
+    return _change(args, lambda storage: [add_new_host_with_cli(storage).name])
+
+
+def run_update(args: Namespace) -> int:
+    from tools.cli import update_host_with_cli
+
+    def update(storage) -> list:
+        host = update_host_with_cli(storage, args.host)
+        return [] if host is None or not host.is_dirty else [host.name]
+
+    return _change(args, update)
+
+
+def run_rm(args: Namespace) -> int:
+    from host import delete_host_names
+
+    def remove(storage) -> list:
+        delete_host_names(storage, args.hosts)
+        return []
+
+    return _change(args, remove, multiple=True, piped=True, rm=args.hosts)
+
+
+def run_sort(args: Namespace) -> int:
+    args.sort = True
+    return _change(args, multiple=True, piped=True)
+
+
+def run_refactor(args: Namespace) -> int:
+    args.refactor = True
+    return _change(args, multiple=True, piped=True)
+
+
+def run_backup(args: Namespace) -> int:
+    args.backup = True
+    return _change(args, multiple=True)
+
+
+def run_restore(args: Namespace) -> int:
+    filename, = get_filenames(args)
+    get_backup_store(filename, args.backup_depth).restore(args.version)
+    return 0
+
+
+def run_import(args: Namespace) -> int:
+    from tools.inventory import get_format_from_filename, import_hosts
+
+    import_format = args.format or get_format_from_filename(args.path)
+
+    def import_from_path(storage) -> list:
+        if args.path == "-":
+            return import_hosts(storage, sys.stdin, import_format)
+        with open(args.path, "r", newline="") as import_file:
+            return import_hosts(storage, import_file, import_format)
+
+    return _change(args, import_from_path, piped=args.path != "-")
+
+
+def run_export(args: Namespace) -> int:
+    from storage import get_storage
+    from tools.inventory import export_hosts, get_format_from_filename
+
+    filename, = get_filenames(args, piped=args.path != "-")
+    export_format = args.format or get_format_from_filename(args.path)
+    if args.path == "-":
+        export_hosts(get_storage(filename), sys.stdout, export_format)
+    else:
+        with open(args.path, "w", newline="") as export_file:
+            export_hosts(get_storage(filename), export_file, export_format)
+    return 0
+
+
+def run_check(args: Namespace) -> int:
+    from storage import get_storage
+    from tools.cli import refactor_config_file
+
+    filename, = get_filenames(args, piped=True)
+    storage = get_storage(filename)
+    unformatted_host_names = refactor_config_file(storage, check=True)
+    for host_name in unformatted_host_names:
+        print(f"{storage.name}: host {host_name} is not formatted")
+    return 1 if unformatted_host_names else 0
+
+
+def run_leases(args: Namespace) -> int:
+    from leases import get_lease_reports
+
+    filename, = get_filenames(args)
+    for report in get_lease_reports(filename, args.path):
+        print("\t".join(value or "-" for value in report))
+    return 0
+
+
+def run_watch(args: Namespace) -> int:
+    from tools.watch import DEFAULT_INTERVAL, watch
+
+    filename, = get_filenames(args)
+    try:
+        for event in watch(filename, DEFAULT_INTERVAL if args.interval is None else args.interval):
+            print(f"{event.kind}\t{event.name}", flush=True)
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+def run_backups(args: Namespace) -> int:
+    filename, = get_filenames(args)
+    backup_store = get_backup_store(filename, args.backup_depth)
+    for version in backup_store.get_versions():
+        record = backup_store.get_record(version)
+        created = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(record["created"]))
+        print(f"{version}\t{created}\t{record['kind']}\t{record['size']} bytes")
+    return 0
+
+
+def run_backup_diff(args: Namespace) -> int:
+    filename, = get_filenames(args)
+    sys.stdout.write(get_backup_store(filename, args.backup_depth).diff(args.version))
+    return 0
@@ -0,0 +1,133 @@
+import csv
+import json
+from typing import Dict, Iterable, Iterator, List, TextIO
+
+from host import Host, add_hosts, iter_hosts
+from host_types import RAW, get_host_type
+from parser import ConfParser
+from storage import Storage, get_storage
+from tools.validators import validate_host_field, validate_hostname, validate_raw_body
+
+FORMATS = ("jsonl", "csv")
+RECORD_FIELDS = (
+    "name",
+    "ethernet",
+    "fixed_addr",
+    "condition_true_filename",
+    "condition_false_filename",
+    "is_deny_booting",
+    "parent",
+    "filename",
+    "host_type",
+    "raw",
+)
+
+
+def get_format_from_filename(filename: str, default: str = "jsonl") -> str:
+    return "csv" if filename.lower().endswith(".csv") else default
+
+
+def host_to_record(host: Host) -> Dict:
+    return {
+        "name": host.name,
+        "ethernet": host.ethernet,
+        "fixed_addr": host.fixed_addr,
+        "condition_true_filename": host.condition_true_filename,
+        "condition_false_filename": host.condition_false_filename,
+        "is_deny_booting": host.is_deny_booting,
+        "parent": host.name.split("alt")[0] if host.is_child else None,
+        "filename": host.filename,
+        "host_type": host.get_host_type(),
+        # raw hosts render their body as is
+        "raw": host.get_config_body() if host.get_host_type() == RAW.name else None,
+    }
+
+
+def record_to_host(record: Dict) -> Host:
+    if not isinstance(record, dict):
+        raise ValueError("Record must be an object")
+    # CSV gives strings for every column, empty cells mean missing values
+    values = {key: (value if value != "" else None) for key, value in record.items() if key in RECORD_FIELDS}
+    is_deny_booting = values.pop("is_deny_booting", None)
+    if isinstance(is_deny_booting, str):
+        is_deny_booting = is_deny_booting.strip().lower() in ("1", "true", "yes", "y")
+    elif not isinstance(is_deny_booting, (bool, type(None))):
+        raise ValueError("is_deny_booting must be a boolean")
+    for key, value in values.items():
+        if value is not None and not isinstance(value, str):
+            raise ValueError(f"{key} must be a string")
+
+    validate_hostname(values.get("name"))
+    host = Host(
+        name=values["name"],
+        ethernet=values.get("ethernet"),
+        is_deny_booting=bool(is_deny_booting),
+        condition_true_filename=values.get("condition_true_filename"),
+        condition_false_filename=values.get("condition_false_filename"),
+        fixed_addr=values.get("fixed_addr"),
+        filename=values.get("filename"),
+        host_type=values.get("host_type")
+    )
+    host_type = get_host_type(host.get_host_type())
+    if host_type is RAW:
+        validate_raw_body(values.get("raw"))
+        # the body may turn out to be one of the typed hosts, whose fields are checked below
+        host.set_raw_value(values["raw"])
+        host_type = get_host_type(host.get_host_type())
+    for field in host_type.fields:
+        validate_host_field(field, getattr(host, field.attribute))
+    return host
+
+
+def iter_host_records(filename: str | Storage) -> Iterator[Dict]:
+    for host in iter_hosts(filename):
+        yield host_to_record(host)
+
+
+def write_records(records: Iterable[Dict], output: TextIO, file_format: str = "jsonl") -> int:
+    count = 0
+    if file_format == "csv":
+        writer = csv.DictWriter(output, fieldnames=RECORD_FIELDS)
+        writer.writeheader()
+        write_record = writer.writerow
+    else:
+        def write_record(record: Dict):
+            output.write(json.dumps(record) + "\n")
+
+    for record in records:
+        write_record(record)
+        count += 1
+    return count
+
+
+def read_records(source: TextIO, file_format: str = "jsonl") -> Iterator[Dict]:
+    if file_format == "csv":
+        yield from csv.DictReader(source)
+        return
+
+    for line in source:
+        if line.strip():
+            yield json.loads(line)
+
+
+def export_hosts(filename: str | Storage, output: TextIO, file_format: str = "jsonl") -> int:
+    return write_records(iter_host_records(filename), output, file_format)
+
+
+def import_hosts(filename: str | Storage, source: TextIO, file_format: str = "jsonl") -> List[str]:
+    storage = get_storage(filename)
+    with storage.open_binary() as f:
+        host_names = {block.name for block in ConfParser.iter_blocks(f)}
+
+    def iter_new_hosts() -> Iterator[Host]:
+        for number, record in enumerate(read_records(source, file_format), start=1):
+            try:
+                host = record_to_host(record)
+            except (KeyError, ValueError) as error:
+                raise ValueError(f"Record {number}: {error}") from error
+            if host.name in host_names:
+                raise ValueError(f"Record {number}: Hostname {host.name} already exists")
+            host_names.add(host.name)
+            yield host
+
+    return add_hosts(storage, iter_new_hosts())
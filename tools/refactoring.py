@@ -21,3 +21,42 @@ def normalize_text(text: str) -> str:
     return add_necessary_spaces(
         normalize_whitespaces(text)
     )
+
+
+def format_text(text: str, tabs_count: int = 0) -> str:
+    normalized = normalize_text(text)
+
+    new_lines = ""
+    for word in normalized.split():
+        if word in ["host", "subnet"]:
+            new_lines += "\n"
+
+        if new_lines and new_lines[-1] == "\n":
+            new_lines += "\t" * tabs_count
+
+        if word == "{":
+            tabs_count += 1
+            new_lines += f"{word}\n"
+            continue
+
+        if word == "}":
+            if new_lines[-1] == "\t":
+                new_lines = new_lines[:-1]
+            tabs_count -= 1
+            new_lines += f"{word}\n"
+            continue
+
+        if ";" in word:
+            new_lines += f"{word}\n"
+            continue
+
+        if word == "deny":
+            new_lines += "\t"
+
+        new_lines += f"{word} "
+    return new_lines
+
+
+def format_host_block(text: str, depth: int = 0) -> str:
+    # Block spans start at "host" and end at "}", the surrounding indentation is not part of them
+    return format_text(text, depth).strip()
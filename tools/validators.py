@@ -1,12 +1,25 @@
 import re
 
 from host import Hosts
+from host_types import HOST_TYPES, HostField
+from parser import ConfParser, ConfSyntaxError
 
 
-def validate_new_hostname(hostname: str, hosts: Hosts):
+def validate_hostname(hostname: str | None):
+    if not hostname:
+        raise ValueError("Hostname is required!")
+
     if len(hostname) < 2:
         raise ValueError("Hostname must be > 2 symbols")
 
+    # these would end the host statement or open a block in the config
+    if any(char.isspace() or char in "{};#\"" for char in hostname):
+        raise ValueError("Hostname can't contain whitespaces or {, }, ;, #, \" chars")
+
+
+def validate_new_hostname(hostname: str, hosts: Hosts):
+    validate_hostname(hostname)
+
     if hosts.find_by_name(hostname) is not None:
         raise ValueError("Hostname already exists")
 
@@ -18,7 +31,7 @@ def validate_ethernet(ethernet: str):
 
 
 def validate_host_pattern_option(option: str):
-    if option not in ("d", "r", "ie"):
+    if option not in [host_type.option for host_type in HOST_TYPES.values()]:
         raise ValueError("Not supported pattern option!")
 
 
@@ -40,3 +53,29 @@ def validate_filename(filename):
 
     if len(filename) < 2:
         raise ValueError("Not valid filename! filename cant be < 2 symbols!")
+
+
+def validate_raw_body(raw: str | None):
+    if not raw:
+        raise ValueError("Raw value is required!")
+
+    # the body must keep the rest of the file out of the host and the host out of the rest of the file
+    try:
+        nodes = ConfParser.parse(f"host raw {{\n{raw}\n}}").children
+    except ConfSyntaxError as error:
+        raise ValueError(f"Raw value is not valid: {error}") from None
+    if len(nodes) != 1:
+        raise ValueError("Raw value can't close its host block")
+
+
+FIELD_VALIDATORS = {
+    "ethernet": validate_ethernet,
+    "filename": validate_filename,
+    "ipv4": validate_ipv4_address,
+}
+
+
+def validate_host_field(field: HostField, value: str | None):
+    if value is None:
+        raise ValueError(f"{field.label} is required!")
+    FIELD_VALIDATORS[field.kind](value)
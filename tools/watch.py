@@ -0,0 +1,211 @@
+import hashlib
+import io
+import os
+import time
+from typing import Callable, Dict, Iterator, List, NamedTuple, Tuple
+
+from host import Host, get_host_from_scanned_block
+from parser import ConfParser, ConfSyntaxError
+
+DEFAULT_INTERVAL = 1.0
+
+ADDED = "added"
+REMOVED = "removed"
+CHANGED = "changed"
+
+
+class HostEvent(NamedTuple):
+    kind: str
+    name: str
+    # None for removed hosts
+    host: Host | None
+
+
+class IndexSegment(NamedTuple):
+    # segments follow each other, so only sizes are kept and an edit doesn't move the rest of the index
+    size: int
+    digest: bytes
+    # block depth at the start of the segment
+    depth: int
+    # None for the text between hosts, span of the host is where it was when it was scanned
+    host: Host | None = None
+
+
+def _get_digest(data: bytes) -> bytes:
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+
+def index_segments(data: bytes, offset: int = 0, depth: int = 0) -> List[IndexSegment]:
+    # Host blocks and the text between them, `offset` is where `data` starts in the file
+    segments = []
+    pointer = 0
+    pointer_depth = depth
+    for block in ConfParser.iter_blocks(io.BytesIO(data)):
+        block_depth = depth + block.depth
+        if block.start > pointer:
+            segments.append(IndexSegment(block.start - pointer, _get_digest(data[pointer:block.start]), pointer_depth))
+        host = get_host_from_scanned_block(block, offset)
+        segments.append(IndexSegment(block.end - block.start, _get_digest(block.source), block_depth, host))
+        pointer = block.end
+        pointer_depth = block_depth
+    if pointer < len(data):
+        segments.append(IndexSegment(len(data) - pointer, _get_digest(data[pointer:]), pointer_depth))
+    return segments
+
+
+def get_host_events(old_segments: List[IndexSegment], new_segments: List[IndexSegment]) -> List[HostEvent]:
+    old_hosts = {segment.host.name: segment for segment in old_segments if segment.host is not None}
+    new_hosts = {segment.host.name: segment for segment in new_segments if segment.host is not None}
+    events = [HostEvent(REMOVED, name, None) for name in old_hosts if name not in new_hosts]
+    for name, segment in new_hosts.items():
+        old_segment = old_hosts.get(name)
+        if old_segment is None:
+            events.append(HostEvent(ADDED, name, segment.host))
+        elif old_segment.digest != segment.digest:
+            events.append(HostEvent(CHANGED, name, segment.host))
+    return events
+
+
+class HostIndex:
+    """Host blocks of a config file with their sizes and content hashes.
+
+    update() checks the old segments against the new data from the head and from the tail by hash
+    and scans only the region between unchanged ones, or the whole data if that region doesn't parse on its own.
+    """
+
+    def __init__(self, data: bytes):
+        self.size = len(data)
+        self.segments = index_segments(data)
+
+    @property
+    def hosts(self) -> Dict[str, Host]:
+        return {segment.host.name: segment.host for segment in self.segments if segment.host is not None}
+
+    def _get_unchanged_head(self, data: bytes) -> Tuple[int, int]:
+        # number of unchanged segments at the head and where they end
+        head = 0
+        pointer = 0
+        for segment in self.segments:
+            end = pointer + segment.size
+            # text at the old end of file can go on in the new data, e.g. an unfinished comment
+            if end > len(data) or (end == self.size and len(data) != self.size):
+                break
+            if _get_digest(data[pointer:end]) != segment.digest:
+                break
+            head += 1
+            pointer = end
+        return head, pointer
+
+    def _get_unchanged_tail(self, data: bytes, head: int, head_end: int) -> Tuple[int, int]:
+        # number of unchanged segments at the tail and where they start in the new data
+        tail = 0
+        pointer = len(data)
+        for segment in reversed(self.segments[head:]):
+            start = pointer - segment.size
+            if start < head_end or _get_digest(data[start:pointer]) != segment.digest:
+                break
+            tail += 1
+            pointer = start
+        return tail, pointer
+
+    def _index_middle(self, data: bytes, head: int, head_end: int, tail: int, tail_start: int):
+        # None when the region between unchanged segments doesn't parse the same way on its own
+        start_depth = self.segments[head].depth if head < len(self.segments) else 0
+        end_depth = self.segments[1 - tail].depth if tail > 1 else 0
+        # the region is scanned on its own, so it must not close blocks opened before it or leave blocks open
+        if start_depth != end_depth:
+            return None
+
+        end = tail_start + self.segments[-tail].size if tail else len(data)
+        try:
+            segments = index_segments(data[head_end:end], head_end, start_depth)
+        except ConfSyntaxError:
+            return None
+        if tail:
+            # the first unchanged segment is scanned too, if it comes out the same the region ends between tokens
+            boundary = self.segments[-tail]
+            if not segments or segments[-1][:3] != boundary[:3]:
+                return None
+            segments.pop()
+        return segments
+
+    def update(self, data: bytes) -> List[HostEvent]:
+        # ConfSyntaxError leaves the index as it was
+        head, head_end = self._get_unchanged_head(data)
+        tail, tail_start = self._get_unchanged_tail(data, head, head_end)
+        new_middle = self._index_middle(data, head, head_end, tail, tail_start)
+        if new_middle is None:
+            head = tail = 0
+            new_middle = index_segments(data)
+
+        old_middle = self.segments[head:len(self.segments) - tail]
+        self.segments[head:len(self.segments) - tail] = new_middle
+        self.size = len(data)
+        return get_host_events(old_middle, new_middle)
+
+
+def get_signature(filename: str) -> Tuple[int, int, int] | None:
+    # inode changes when the file is replaced, e.g. by an atomic write
+    try:
+        stat = os.stat(filename)
+    except FileNotFoundError:
+        return None
+    return stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+
+class Watcher:
+    def __init__(self, filename: str):
+        self.filename = filename
+        self.signature = None
+        self.index: HostIndex | None = None
+        try:
+            self.poll()
+        except ConfSyntaxError:
+            # the first poll that parses the file gives the starting state
+            pass
+
+    def poll(self) -> List[HostEvent]:
+        signature = get_signature(self.filename)
+        if signature is None or signature == self.signature:
+            return []
+        with open(self.filename, "rb") as f:
+            data = f.read()
+        if self.index is None:
+            self.index = HostIndex(data)
+            events = []
+        else:
+            events = self.index.update(data)
+        # a file that doesn't parse is read again on the next poll
+        self.signature = signature
+        return events
+
+
+def _get_waiter(filename: str, interval: float) -> Tuple[Callable[[], None], Callable[[], None]]:
+    # inotify_simple is optional, without it the file is polled every `interval` seconds
+    try:
+        from inotify_simple import INotify, flags
+    except ImportError:
+        return lambda: time.sleep(interval), lambda: None
+
+    inotify = INotify()
+    # the directory is watched, so a replaced file is still seen
+    inotify.add_watch(
+        os.path.dirname(os.path.abspath(filename)),
+        flags.MODIFY | flags.CLOSE_WRITE | flags.MOVED_TO | flags.CREATE
+    )
+    return lambda: inotify.read(timeout=int(interval * 1000)), inotify.close
+
+
+def watch(filename: str, interval: float = DEFAULT_INTERVAL) -> Iterator[HostEvent]:
+    # Runs until the caller stops iterating, while the file doesn't parse the last index is kept
+    watcher = Watcher(filename)
+    wait, close = _get_waiter(filename, interval)
+    try:
+        while True:
+            wait()
+            try:
+                yield from watcher.poll()
+            except ConfSyntaxError:
+                continue
+    finally:
+        close()